@@ -0,0 +1,29 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Attachment
+from app.storage import Storage
+from app.transaction import run_in_transaction
+
+
+# Serializes writers of one blob: persisting an upload and removing the last
+# reference to the same content cannot interleave.
+async def lock_blob(db: AsyncSession, sha256: str) -> None:
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(sha256))))
+
+
+# Runs after the deleting transaction has committed, in one of its own, so a
+# rolled back or retried delete never loses the blob of a surviving row. A
+# blob left behind when this fails is removed by app.storage.sweep.
+async def delete_if_unreferenced(storage: Storage, sha256: str) -> None:
+    async def work(db: AsyncSession) -> None:
+        await lock_blob(db, sha256)
+        still_referenced = await db.scalar(
+            select(func.count())
+            .select_from(Attachment)
+            .where(Attachment.content_sha256 == sha256)
+        )
+        if not still_referenced:
+            await storage.delete(sha256)
+
+    await run_in_transaction(work)
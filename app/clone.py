@@ -0,0 +1,90 @@
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Every statement copies all rows of one table with INSERT .. SELECT. Columns
+# and tasks get fresh ids from gen_random_uuid(); the old-to-new mapping is
+# kept in temporary tables so their children can be re-pointed. No row ever
+# travels to the application.
+CLONE_COLUMNS_SQL = [
+    """
+    CREATE TEMP TABLE clone_columns ON COMMIT DROP AS
+    SELECT id AS old_id, gen_random_uuid() AS new_id
+    FROM columns WHERE board_id = CAST(:source AS uuid)
+    """,
+    """
+    INSERT INTO columns (id, board_id, title, display_order, color)
+    SELECT m.new_id, CAST(:board AS uuid), c.title, c.display_order, c.color
+    FROM columns c
+    JOIN clone_columns m ON m.old_id = c.id
+    """,
+]
+
+CLONE_TASKS_SQL = [
+    """
+    CREATE TEMP TABLE clone_tasks ON COMMIT DROP AS
+    SELECT id AS old_id, gen_random_uuid() AS new_id
+    FROM tasks WHERE board_id = CAST(:source AS uuid)
+    """,
+    """
+    INSERT INTO tasks (
+        id, board_id, column_id, title, priority, deadline, display_order,
+        is_completed, color, started_at, completed_at, created_by
+    )
+    SELECT
+        m.new_id, CAST(:board AS uuid), cm.new_id, t.title, t.priority,
+        t.deadline, t.display_order, t.is_completed, t.color, t.started_at,
+        t.completed_at, t.created_by
+    FROM tasks t
+    JOIN clone_tasks m ON m.old_id = t.id
+    JOIN clone_columns cm ON cm.old_id = t.column_id
+    """,
+]
+
+CLONE_SUBTASKS_SQL = """
+INSERT INTO subtasks (id, task_id, title, is_completed, display_order, color)
+SELECT gen_random_uuid(), m.new_id, s.title, s.is_completed, s.display_order,
+       s.color
+FROM subtasks s
+JOIN clone_tasks m ON m.old_id = s.task_id
+"""
+
+CLONE_MEMBERS_SQL = """
+INSERT INTO board_members (board_id, user_id, role)
+SELECT CAST(:board AS uuid), user_id, role
+FROM board_members WHERE board_id = CAST(:source AS uuid)
+"""
+
+CLONE_ASSIGNEES_SQL = """
+INSERT INTO task_assignees (task_id, user_id)
+SELECT m.new_id, a.user_id
+FROM task_assignees a
+JOIN clone_tasks m ON m.old_id = a.task_id
+"""
+
+
+# Copies the columns and, as requested, the tasks, subtasks and members of
+# `source` into the empty board `board`. Assignees are copied only together
+# with both tasks and members. Comments and attachments are never copied.
+async def clone_board_contents(
+    db: AsyncSession,
+    source: uuid.UUID,
+    board: uuid.UUID,
+    include_tasks: bool = True,
+    include_subtasks: bool = True,
+    include_members: bool = False,
+) -> None:
+    params = {"source": source, "board": board}
+    statements = list(CLONE_COLUMNS_SQL)
+    if include_tasks:
+        statements += CLONE_TASKS_SQL
+        if include_subtasks:
+            statements.append(CLONE_SUBTASKS_SQL)
+    if include_members:
+        statements.append(CLONE_MEMBERS_SQL)
+        if include_tasks:
+            statements.append(CLONE_ASSIGNEES_SQL)
+
+    for statement in statements:
+        await db.execute(text(statement), params)
@@ -1,4 +1,6 @@
 import os
+import time
+import asyncpg
 from dotenv import load_dotenv
 
 from sqlalchemy.ext.asyncio import (
@@ -6,7 +8,17 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
 )
+from sqlalchemy.exc import TimeoutError as PoolTimeout
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.metrics import (
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CONNECTIONS,
+    DB_POOL_SATURATION,
+    registry,
+)
 
 load_dotenv()
 
@@ -16,18 +28,52 @@ DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
 DATABASE_URL = (
     f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}"
     f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
+
+# Times every checkout, including the wait for a free connection and the
+# pre-ping.
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeout:
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=True,
     pool_pre_ping=True,
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
 )
 
 
+def _collect_pool_stats() -> None:
+    pool = engine.sync_engine.pool
+    checked_out = pool.checkedout()
+    DB_POOL_CONNECTIONS.set(checked_out, "checked_out")
+    DB_POOL_CONNECTIONS.set(pool.checkedin(), "idle")
+    DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), "overflow")
+    capacity = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+    DB_POOL_SATURATION.set(checked_out / capacity)
+
+
+registry.add_collector(_collect_pool_stats)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -37,3 +83,13 @@ AsyncSessionLocal = async_sessionmaker(
     class_=AsyncSession,
     expire_on_commit=False,
 )
+
+
+async def connect_raw() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+    )
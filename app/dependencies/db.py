@@ -1,6 +1,14 @@
+from fastapi import Request
+
 from app.db import AsyncSessionLocal
 
 
-async def get_db():
+async def get_db(request: Request):
+    # Routes using TransactionalRoute own the session and its transaction.
+    session = getattr(request.state, "db", None)
+    if session is not None:
+        yield session
+        return
+
     async with AsyncSessionLocal() as session:
         yield session
@@ -0,0 +1,6 @@
+from app.storage import Storage, storage
+
+
+# Overridable through app.dependency_overrides to swap the storage backend.
+def get_storage() -> Storage:
+    return storage
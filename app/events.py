@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+from sqlalchemy import Text, cast, func, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import connect_raw
+from app.metrics import BOARD_EVENT_SUBSCRIBERS, registry
+from app.models import Task
+
+logger = logging.getLogger(__name__)
+
+EVENT_CHANNEL = "board_events"
+EVENT_BUFFER_SIZE = int(os.getenv("BOARD_EVENT_BUFFER_SIZE", "100"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("BOARD_EVENT_KEEPALIVE_SECONDS", "30"))
+EVENT_RECONNECT_DELAY = float(os.getenv("BOARD_EVENT_RECONNECT_DELAY", "1"))
+EVENT_HUB_ENABLED = os.getenv("BOARD_EVENT_HUB", "1") == "1"
+
+# Sent instead of the events a subscriber may have missed; clients reload
+# the board view when they see it.
+RESYNC = json.dumps({"type": "resync"})
+
+
+def task_board(task_id):
+    return select(Task.board_id).where(Task.id == task_id).scalar_subquery()
+
+
+# Queues a change event for the board. NOTIFY is transactional: the event is
+# delivered to every listening worker when the request's transaction commits
+# and dropped with it on rollback, so retried transactions never emit twice.
+# `board_id` may be a SQL expression such as task_board(). Events carry ids
+# only and stay far below the 8000 byte NOTIFY payload limit.
+async def publish(db: AsyncSession, board_id, event_type: str, **data) -> None:
+    body = json.dumps({"type": event_type, **data}, default=str)
+    payload = func.jsonb_build_object("board_id", board_id).op("||")(
+        cast(body, JSONB)
+    )
+    await db.execute(select(func.pg_notify(EVENT_CHANNEL, cast(payload, Text))))
+
+
+class Subscription:
+    def __init__(self, board_id: str, maxsize: int = EVENT_BUFFER_SIZE):
+        self.board_id = board_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def push(self, message: str) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client does not keep up. Instead of buffering without bound
+            # it gets a resync and is disconnected.
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+# One LISTEN connection per worker process fans the notifications out to the
+# WebSocket subscribers of that process, each behind its own bounded buffer.
+class BoardEventHub:
+    def __init__(self):
+        self.subscribers: dict[str, set[Subscription]] = {}
+        self.task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+
+    def subscribe(self, board_id: uuid.UUID) -> Subscription:
+        subscription = Subscription(str(board_id))
+        self.subscribers.setdefault(subscription.board_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self.subscribers.get(subscription.board_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self.subscribers[subscription.board_id]
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            board_id = json.loads(payload)["board_id"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed board event: %r", payload)
+            return
+        for subscription in list(self.subscribers.get(board_id, ())):
+            subscription.push(payload)
+
+    def _resync_all(self) -> None:
+        for subscribers in self.subscribers.values():
+            for subscription in subscribers:
+                subscription.push(RESYNC)
+
+    async def _listen(self) -> None:
+        conn = await connect_raw()
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        try:
+            await conn.add_listener(EVENT_CHANNEL, self._on_notify)
+            # Anything published while the previous connection was down is
+            # gone.
+            self._resync_all()
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Surfaces half-open connections that would otherwise
+                    # stay silent forever.
+                    await conn.execute("SELECT 1")
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Board event listener failed, reconnecting")
+            await asyncio.sleep(EVENT_RECONNECT_DELAY)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+
+hub = BoardEventHub()
+
+
+def _collect_subscriber_count() -> None:
+    BOARD_EVENT_SUBSCRIBERS.set(
+        sum(len(subscribers) for subscribers in hub.subscribers.values())
+    )
+
+
+registry.add_collector(_collect_subscriber_count)
@@ -0,0 +1,426 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Board
+from app.schemas import (
+    BoardImport,
+    BoardImportColumn,
+    BoardImportComment,
+    BoardImportMember,
+    BoardImportSubtask,
+    BoardImportTask,
+)
+from app.workflow import DONE_TITLES, IN_PROGRESS_TITLES
+
+logger = logging.getLogger(__name__)
+
+IMPORT_MAX_BYTES = int(
+    os.getenv("BOARD_IMPORT_MAX_BYTES", str(50 * 1024 * 1024))
+)
+
+# Staging tables the document is copied into. Rows refer to their parents by
+# the integer refs assigned in build_rows(); members, columns and tasks get
+# their final ids from the column default while they are copied.
+STAGING_SQL = """
+CREATE TEMP TABLE import_members (
+    ref int, name text, email text, role text,
+    id uuid DEFAULT gen_random_uuid()
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_columns (
+    ref int, title text, color text, display_order int,
+    id uuid DEFAULT gen_random_uuid()
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_tasks (
+    ref int, column_ref int, title text, priority text,
+    deadline timestamptz, is_completed bool, is_started bool, color text,
+    display_order int,
+    id uuid DEFAULT gen_random_uuid()
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_subtasks (
+    task_ref int, title text, is_completed bool, color text, display_order int
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_comments (
+    task_ref int, member_ref int, content text, created_at timestamptz
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_assignees (
+    task_ref int, member_ref int
+) ON COMMIT DROP;
+"""
+
+STAGING_COLUMNS = {
+    "members": ("ref", "name", "email", "role"),
+    "columns": ("ref", "title", "color", "display_order"),
+    "tasks": (
+        "ref",
+        "column_ref",
+        "title",
+        "priority",
+        "deadline",
+        "is_completed",
+        "is_started",
+        "color",
+        "display_order",
+    ),
+    "subtasks": ("task_ref", "title", "is_completed", "color", "display_order"),
+    "comments": ("task_ref", "member_ref", "content", "created_at"),
+    "assignees": ("task_ref", "member_ref"),
+}
+
+# Existing users are matched by email like in the bulk member import. The
+# match runs again after the insert to pick up users created concurrently.
+# Members without an email cannot be matched and are not turned into users:
+# they are dropped first, with them their assignments, and the comments they
+# wrote are kept without an author.
+MATCH_USERS_SQL = """
+UPDATE import_members m SET id = u.id
+FROM users u
+WHERE m.email IS NOT NULL AND lower(u.email) = m.email
+"""
+
+USERS_SQL = [
+    "DELETE FROM import_members WHERE email IS NULL",
+    MATCH_USERS_SQL,
+    """
+    INSERT INTO users (id, name, email)
+    SELECT m.id, m.name, m.email FROM import_members m
+    WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = m.id)
+    ON CONFLICT (email) DO NOTHING
+    """,
+    MATCH_USERS_SQL,
+]
+
+# $1 is the id of the new board.
+MERGE_SQL = [
+    """
+    INSERT INTO board_members (board_id, user_id, role)
+    SELECT DISTINCT ON (id) $1::uuid, id, role FROM import_members
+    ORDER BY id, ref
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO columns (id, board_id, title, color, display_order)
+    SELECT id, $1::uuid, title, color, display_order FROM import_columns
+    """,
+    """
+    INSERT INTO tasks (
+        id, board_id, column_id, title, priority, deadline, display_order,
+        is_completed, color, started_at, completed_at
+    )
+    SELECT
+        t.id, $1::uuid, c.id, t.title, t.priority::priority_level, t.deadline,
+        t.display_order, t.is_completed, t.color,
+        CASE WHEN t.is_started THEN now() END,
+        CASE WHEN t.is_completed THEN now() END
+    FROM import_tasks t
+    JOIN import_columns c ON c.ref = t.column_ref
+    """,
+    """
+    INSERT INTO subtasks (id, task_id, title, is_completed, color, display_order)
+    SELECT gen_random_uuid(), t.id, s.title, s.is_completed, s.color,
+           s.display_order
+    FROM import_subtasks s
+    JOIN import_tasks t ON t.ref = s.task_ref
+    """,
+    """
+    INSERT INTO comments (id, task_id, user_id, content, created_at)
+    SELECT gen_random_uuid(), t.id, m.id, c.content,
+           coalesce(c.created_at, now())
+    FROM import_comments c
+    JOIN import_tasks t ON t.ref = c.task_ref
+    LEFT JOIN import_members m ON m.ref = c.member_ref
+    """,
+    """
+    INSERT INTO task_assignees (task_id, user_id)
+    SELECT DISTINCT t.id, m.id
+    FROM import_assignees a
+    JOIN import_tasks t ON t.ref = a.task_ref
+    JOIN import_members m ON m.ref = a.member_ref
+    """,
+]
+
+
+def _invalid(detail) -> HTTPException:
+    return HTTPException(status_code=422, detail=detail)
+
+
+def _position(item: dict) -> float:
+    return item.get("pos", 0)
+
+
+# Archived lists and cards are skipped. Card descriptions and labels have no
+# counterpart on our tasks and are dropped. Trello exports carry no member
+# emails, so cards lose their assignees and comments their authors.
+def from_trello(doc: dict) -> BoardImport:
+    members = [
+        BoardImportMember(
+            ref=member["id"],
+            name=member.get("fullName") or member.get("username") or "",
+        )
+        for member in doc.get("members", [])
+    ]
+    member_refs = {member.ref for member in members}
+
+    checklists: dict[str, list] = {}
+    for checklist in sorted(doc.get("checklists", []), key=_position):
+        items = sorted(checklist.get("checkItems", []), key=_position)
+        checklists.setdefault(checklist.get("idCard"), []).extend(
+            BoardImportSubtask(
+                title=item.get("name", ""),
+                is_completed=item.get("state") == "complete",
+            )
+            for item in items
+        )
+
+    comments: dict[str, list] = {}
+    # Trello lists actions newest first.
+    for action in reversed(doc.get("actions", [])):
+        if action.get("type") != "commentCard":
+            continue
+        data = action.get("data", {})
+        author = action.get("idMemberCreator")
+        comments.setdefault(data.get("card", {}).get("id"), []).append(
+            BoardImportComment(
+                content=data.get("text", ""),
+                author=author if author in member_refs else None,
+                created_at=action.get("date"),
+            )
+        )
+
+    cards: dict[str, list] = {}
+    for card in sorted(doc.get("cards", []), key=_position):
+        if card.get("closed"):
+            continue
+        cards.setdefault(card.get("idList"), []).append(
+            BoardImportTask(
+                title=card.get("name", ""),
+                deadline=card.get("due"),
+                is_completed=bool(card.get("dueComplete")),
+                assignees=[
+                    m for m in card.get("idMembers", []) if m in member_refs
+                ],
+                subtasks=checklists.get(card["id"], []),
+                comments=comments.get(card["id"], []),
+            )
+        )
+
+    columns = [
+        BoardImportColumn(
+            title=trello_list.get("name", ""),
+            tasks=cards.get(trello_list["id"], []),
+        )
+        for trello_list in sorted(doc.get("lists", []), key=_position)
+        if not trello_list.get("closed")
+    ]
+
+    return BoardImport(
+        title=doc.get("name") or "Trello import",
+        members=members,
+        columns=columns,
+    )
+
+
+# One row per task: column, title and optionally priority, deadline,
+# is_completed, color and assignees (emails separated by ";").
+def from_csv(text: str, title: str) -> BoardImport:
+    columns: dict[str, BoardImportColumn] = {}
+    members: dict[str, BoardImportMember] = {}
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not {"column", "title"} <= set(reader.fieldnames or ()):
+        raise _invalid("CSV needs at least the columns: column, title")
+
+    for row in reader:
+        emails = [
+            email.strip().lower()
+            for email in (row.get("assignees") or "").split(";")
+            if email.strip()
+        ]
+        for email in emails:
+            members.setdefault(
+                email, BoardImportMember(ref=email, name=email, email=email)
+            )
+
+        column = columns.setdefault(
+            row["column"], BoardImportColumn(title=row["column"])
+        )
+        column.tasks.append(
+            BoardImportTask(
+                title=row["title"],
+                priority=row.get("priority") or None,
+                deadline=row.get("deadline") or None,
+                is_completed=(row.get("is_completed") or "").lower()
+                in {"1", "true", "yes"},
+                color=row.get("color") or None,
+                assignees=emails,
+            )
+        )
+
+    return BoardImport(
+        title=title,
+        members=list(members.values()),
+        columns=list(columns.values()),
+    )
+
+
+# The limit is checked while the body arrives, so an oversized upload is
+# refused before it is held in memory.
+async def read_import(chunks: AsyncIterator[bytes]) -> bytes:
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > IMPORT_MAX_BYTES:
+            raise HTTPException(
+                status_code=413, detail="Import document too large"
+            )
+    return bytes(body)
+
+
+def parse_import(body: bytes, source: str, title: str | None) -> BoardImport:
+    try:
+        if source == "csv":
+            doc = from_csv(body.decode("utf-8-sig"), title or "CSV import")
+        elif source == "trello":
+            trello = json.loads(body)
+            if not isinstance(trello, dict):
+                raise _invalid("Trello export must be a JSON object")
+            doc = from_trello(trello)
+        else:
+            doc = BoardImport.model_validate_json(body)
+    except ValidationError as exc:
+        raise _invalid(exc.errors(include_url=False, include_context=False))
+    # Trello exports are read without a schema; wrong types anywhere in them
+    # surface as one of these.
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise _invalid(f"Malformed {source} document: {exc}")
+
+    if title is not None:
+        doc.title = title
+    return doc
+
+
+def build_rows(doc: BoardImport) -> dict[str, list[tuple]]:
+    rows: dict[str, list[tuple]] = {table: [] for table in STAGING_COLUMNS}
+
+    member_refs: dict[str, int] = {}
+    emails: set[str] = set()
+    for member in doc.members:
+        if member.ref in member_refs:
+            raise _invalid(f"Duplicate member ref {member.ref!r}")
+        email = (member.email or "").strip().lower() or None
+        if email is not None:
+            if email in emails:
+                raise _invalid(f"Duplicate member email {email!r}")
+            emails.add(email)
+        member_refs[member.ref] = len(member_refs)
+        rows["members"].append(
+            (member_refs[member.ref], member.name, email, member.role)
+        )
+
+    def member_ref(ref: str) -> int:
+        if ref not in member_refs:
+            raise _invalid(f"Unknown member ref {ref!r}")
+        return member_refs[ref]
+
+    task_ref = 0
+    for column_ref, column in enumerate(doc.columns):
+        rows["columns"].append(
+            (column_ref, column.title, column.color, column_ref + 1)
+        )
+
+        for order, task in enumerate(column.tasks):
+            # Tasks follow the workflow of the column they land in.
+            is_completed = task.is_completed or column.title in DONE_TITLES
+            rows["tasks"].append(
+                (
+                    task_ref,
+                    column_ref,
+                    task.title,
+                    task.priority.value if task.priority is not None else None,
+                    task.deadline,
+                    is_completed,
+                    column.title in IN_PROGRESS_TITLES,
+                    task.color or "#FFF",
+                    order,
+                )
+            )
+            rows["subtasks"].extend(
+                (task_ref, subtask.title, subtask.is_completed, subtask.color, index)
+                for index, subtask in enumerate(task.subtasks)
+            )
+            rows["comments"].extend(
+                (
+                    task_ref,
+                    None if comment.author is None else member_ref(comment.author),
+                    comment.content,
+                    comment.created_at,
+                )
+                for comment in task.comments
+            )
+            rows["assignees"].extend(
+                (task_ref, member_ref(ref)) for ref in task.assignees
+            )
+            task_ref += 1
+
+    return rows
+
+
+# Loads the document with COPY into temporary staging tables and merges it
+# into the real tables with one INSERT .. SELECT per table, all inside the
+# request's transaction: a failed import leaves nothing behind. The counter
+# triggers run once per statement instead of once per created row.
+async def load_board(db: AsyncSession, doc: BoardImport) -> dict:
+    started = time.perf_counter()
+    stages = []
+
+    def stage(name: str, rows: int, since: float) -> float:
+        now = time.perf_counter()
+        stages.append({"name": name, "rows": rows, "seconds": now - since})
+        logger.info("board import %s: %d rows in %.3fs", name, rows, now - since)
+        return now
+
+    rows = build_rows(doc)
+    total = sum(len(table_rows) for table_rows in rows.values())
+    mark = stage("parse", total, started)
+
+    # Inserting the board through the session also opens the transaction the
+    # raw asyncpg calls below take part in.
+    board = Board(title=doc.title, owner_id=doc.owner_id)
+    db.add(board)
+    await db.flush()
+
+    conn = await db.connection()
+    driver = (await conn.get_raw_connection()).driver_connection
+
+    await driver.execute(STAGING_SQL)
+    for table, table_rows in rows.items():
+        if table_rows:
+            await driver.copy_records_to_table(
+                f"import_{table}",
+                records=table_rows,
+                columns=STAGING_COLUMNS[table],
+            )
+        mark = stage(f"copy {table}", len(table_rows), mark)
+
+    for statement in USERS_SQL:
+        await driver.execute(statement)
+    for statement in MERGE_SQL:
+        await driver.execute(statement, board.id)
+    mark = stage("merge", total, mark)
+
+    seconds = mark - started
+    return {
+        "board_id": board.id,
+        "rows": {table: len(table_rows) for table, table_rows in rows.items()},
+        "stages": stages,
+        "seconds": seconds,
+        "rows_per_second": total / seconds if seconds > 0 else float(total),
+    }
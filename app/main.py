@@ -1,15 +1,50 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from app.dependencies.db import get_db
+from app.events import EVENT_HUB_ENABLED, hub
+from app.metrics import MetricsMiddleware, registry
+from app.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.sqlstats import SqlStatsMiddleware
+from app.purge import PURGE_WORKER_ENABLED, run_purge_worker
+from app.thumbnails import THUMBNAIL_WORKER_ENABLED, thumbnails
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
 
 
 from app.routers import (
-    users, boards, columns, tasks, subtasks, comments, attachments, members, stats
+    users, boards, columns, tasks, subtasks, comments, attachments, members, stats,
+    events, admin,
 )
 
-app = FastAPI(title="Kanban API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    purge_worker = None
+    if PURGE_WORKER_ENABLED:
+        purge_worker = asyncio.create_task(run_purge_worker())
+    if THUMBNAIL_WORKER_ENABLED:
+        thumbnails.start()
+    if EVENT_HUB_ENABLED:
+        hub.start()
+
+    yield
+
+    await hub.stop()
+    await thumbnails.stop()
+
+    if purge_worker is not None:
+        purge_worker.cancel()
+        try:
+            await purge_worker
+        except asyncio.CancelledError:
+            pass
+
+
+app = FastAPI(title="Kanban API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +53,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(SqlStatsMiddleware)
+# Added last so it is the outermost middleware and times everything.
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(boards.router, prefix="/boards", tags=["boards"])
@@ -29,6 +69,18 @@ app.include_router(attachments.router,
                    prefix="/attachments", tags=["attachments"])
 app.include_router(members.router, prefix="/members", tags=["board_members"])
 app.include_router(stats.router, prefix="/boards", tags=["stats"])
+app.include_router(events.router, prefix="/boards", tags=["events"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+
+
+# Prometheus text format. Counters are per worker process; scrape each worker
+# or aggregate them in the query.
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4",
+    )
 
 
 @app.get("/health/db")
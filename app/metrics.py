@@ -0,0 +1,238 @@
+import bisect
+import math
+import time
+from typing import Callable, Iterator
+
+# Latency buckets in seconds, roughly exponential from 5ms to 10s.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = tuple(float(4 ** n * 64) for n in range(10))  # 64 B .. 16 MiB
+
+# Requests that matched no route share one label value, so scanners cannot
+# blow up the number of series.
+UNMATCHED_ROUTE = "unmatched"
+# Likewise for the request method, which the client can make up.
+KNOWN_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+)
+OTHER_METHOD = "other"
+
+
+def method_label(method: str) -> str:
+    return method if method in KNOWN_METHODS else OTHER_METHOD
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# The metric types keep one plain list or float per label combination and are
+# only touched from the event loop thread, so recording a value is a dict
+# lookup and an addition, without locks or per-request objects.
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series: dict[tuple, float] = {}
+
+    def inc(self, *values, amount: float = 1) -> None:
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for values, total in self.series.items():
+            yield (
+                f"{self.name}{_format_labels(self.labels, values)} "
+                f"{_format_value(total)}"
+            )
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, *values) -> None:
+        self.series[values] = value
+
+    def dec(self, *values, amount: float = 1) -> None:
+        self.series[values] = self.series.get(values, 0) - amount
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Per series: one counter per bucket plus +Inf, then the sum.
+        self.series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *values) -> None:
+        counts = self.series.get(values)
+        if counts is None:
+            counts = self.series[values] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        bounds = self.buckets + (math.inf,)
+        for values, counts in self.series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket{_format_labels(self.labels, values, le)} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labels, values)
+            yield f"{self.name}_sum{labels} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+        # Called before every scrape to refresh gauges that are read from
+        # other components (pool, queues) instead of being updated inline.
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code.",
+    ("method", "route", "status"),
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Time until the last byte of the response was sent.",
+    ("method", "route"),
+))
+HTTP_RESPONSE_BYTES = registry.register(Histogram(
+    "http_response_size_bytes",
+    "Response body size.",
+    ("method", "route"),
+    SIZE_BUCKETS,
+))
+HTTP_IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled.",
+    ("method",),
+))
+DB_POOL_CHECKOUT_SECONDS = registry.register(Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool.",
+))
+DB_POOL_CHECKOUT_TIMEOUTS = registry.register(Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a free connection.",
+))
+DB_POOL_CONNECTIONS = registry.register(Gauge(
+    "db_pool_connections",
+    "Pooled connections by state.",
+    ("state",),
+))
+DB_POOL_SATURATION = registry.register(Gauge(
+    "db_pool_saturation_ratio",
+    "Checked out connections over the most the pool will open.",
+))
+THUMBNAIL_QUEUE = registry.register(Gauge(
+    "thumbnail_queue",
+    "Thumbnail jobs by state; completed, failed and dropped only grow.",
+    ("state",),
+))
+BOARD_EVENT_SUBSCRIBERS = registry.register(Gauge(
+    "board_event_subscribers",
+    "Open board event WebSocket subscriptions.",
+))
+
+
+# Pure ASGI middleware: it only wraps `send` to see the status and body size,
+# so streamed responses pass through untouched and are timed to their end.
+# The size is taken from Content-Length where there is one: a file sent with
+# http.response.pathsend carries no body bytes through `send` at all.
+# Routes are labelled with their path template, e.g. /boards/{board_id}.
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = method_label(scope["method"])
+        status = 500
+        size = 0
+        content_length = None
+
+        async def send_wrapper(message):
+            nonlocal status, size, content_length
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-length":
+                        content_length = int(value)
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec(method)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            HTTP_REQUESTS.inc(method, route, status)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method, route)
+            if content_length is not None:
+                size = content_length
+            HTTP_RESPONSE_BYTES.observe(size, method, route)
@@ -0,0 +1,100 @@
+import asyncio
+import re
+from pathlib import Path
+
+from app.db import connect_raw
+from app.reconcile import reconcile
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+# Files starting with this marker are applied statement by statement outside
+# of a transaction (needed for CREATE INDEX CONCURRENTLY).
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+
+# Serializes concurrent runs, e.g. several containers starting at once.
+ADVISORY_LOCK_KEY = 7_265_001
+
+# Counters a migration adds empty and that are filled right after it, batch by
+# batch in transactions of their own. A failed backfill is resumed by running
+# python -m app.reconcile.
+BACKFILLS = {
+    "0010": "task counters",
+}
+
+
+def discover_migrations() -> list[tuple[str, str, Path]]:
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        version, _, name = path.stem.partition("_")
+        migrations.append((version, name, path))
+    return migrations
+
+
+def split_statements(sql: str) -> list[str]:
+    statements = []
+    for chunk in re.split(r";\s*$", sql, flags=re.MULTILINE):
+        lines = [
+            line for line in chunk.splitlines()
+            if line.strip() and not line.strip().startswith("--")
+        ]
+        if lines:
+            statements.append("\n".join(lines))
+    return statements
+
+
+async def migrate() -> list[str]:
+    conn = await connect_raw()
+    applied_now = []
+    try:
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR PRIMARY KEY,
+                name VARCHAR NOT NULL,
+                applied_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL
+            )
+            """
+        )
+        await conn.execute("SELECT pg_advisory_lock($1)", ADVISORY_LOCK_KEY)
+        try:
+            rows = await conn.fetch("SELECT version FROM schema_migrations")
+            applied = {row["version"] for row in rows}
+
+            for version, name, path in discover_migrations():
+                if version in applied:
+                    continue
+
+                sql = path.read_text()
+                if sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+                    for statement in split_statements(sql):
+                        await conn.execute(statement)
+                    await conn.execute(
+                        "INSERT INTO schema_migrations (version, name) "
+                        "VALUES ($1, $2)",
+                        version, name,
+                    )
+                else:
+                    async with conn.transaction():
+                        await conn.execute(sql)
+                        await conn.execute(
+                            "INSERT INTO schema_migrations (version, name) "
+                            "VALUES ($1, $2)",
+                            version, name,
+                        )
+                applied_now.append(path.name)
+
+                if version in BACKFILLS:
+                    await reconcile(only={BACKFILLS[version]})
+        finally:
+            await conn.execute(
+                "SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY
+            )
+    finally:
+        await conn.close()
+
+    return applied_now
+
+
+if __name__ == "__main__":
+    for name in asyncio.run(migrate()):
+        print(f"applied {name}")
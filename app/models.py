@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
 from sqlalchemy import (
-    Column, String, Text, Integer, Boolean,
-    TIMESTAMP, ForeignKey
+    Column, String, Text, Integer, BigInteger, Boolean,
+    TIMESTAMP, ForeignKey, Index, Computed, text
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
 from sqlalchemy import Enum as SAEnum
 from enum import Enum as PyEnum
@@ -20,11 +21,29 @@ class Priority(PyEnum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index(
+            "ix_users_name_trgm",
+            text("lower(name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_users_email_trgm",
+            text("lower(email) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+        Index("ix_users_name_prefix", text("lower(name) text_pattern_ops")),
+        Index("ix_users_email_prefix", text("lower(email) text_pattern_ops")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String)
     email: Mapped[str | None] = mapped_column(String, unique=True)
     avatar_url: Mapped[str | None] = mapped_column(String)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now()
+    )
 
     boards_owned: Mapped[list["Board"]] = relationship(back_populates="owner")
     comments: Mapped[list["Comment"]] = relationship(back_populates="author")
@@ -38,6 +57,25 @@ class User(Base):
 
 class Board(Base):
     __tablename__ = "boards"
+    __table_args__ = (
+        Index(
+            "ix_boards_created_at_id_live",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_boards_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_boards_templates_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_template AND deleted_at IS NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = mapped_column(String)
@@ -51,20 +89,44 @@ class Board(Base):
     )
     owner_id: Mapped[uuid.UUID | None] = mapped_column(
         ForeignKey("users.id"),
+        index=True,
         nullable=True,
     )
+    deleted_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=True,
+    )
+    is_template: Mapped[bool] = mapped_column(
+        Boolean, server_default=text("false"))
+    # Maintained by triggers on tasks (migration 0006), never written by the
+    # application.
+    task_count: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"))
+    open_task_count: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"))
 
     owner: Mapped["User"] = relationship(back_populates="boards_owned")
 
-    columns: Mapped[list["Column"]] = relationship(back_populates="board")
-    members: Mapped[list["BoardMember"]] = relationship(back_populates="board")
+    columns: Mapped[list["Column"]] = relationship(
+        back_populates="board", passive_deletes=True)
+    members: Mapped[list["BoardMember"]] = relationship(
+        back_populates="board", passive_deletes=True)
 
 
 class Column(Base):
     __tablename__ = "columns"
+    __table_args__ = (
+        Index(
+            "ix_columns_board_id_display_order_id",
+            "board_id",
+            "display_order",
+            "id",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    board_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("boards.id"))
+    board_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("boards.id", ondelete="CASCADE"))
     title: Mapped[str] = mapped_column(String)
     display_order: Mapped[int] = mapped_column(Integer)
     color: Mapped[str | None] = mapped_column(String)
@@ -73,19 +135,61 @@ class Column(Base):
     )
 
     board: Mapped["Board"] = relationship(back_populates="columns")
-    tasks: Mapped[list["Task"]] = relationship(back_populates="column")
+    tasks: Mapped[list["Task"]] = relationship(
+        back_populates="column", passive_deletes=True)
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index(
+            "ix_tasks_column_id_display_order_id",
+            "column_id",
+            "display_order",
+            "id",
+        ),
+        Index(
+            "ix_tasks_board_id_deadline_id_open",
+            "board_id",
+            "deadline",
+            "id",
+            postgresql_where=text("completed_at IS NULL"),
+        ),
+        Index(
+            "ix_tasks_deadline_id_open",
+            "deadline",
+            "id",
+            postgresql_where=text("completed_at IS NULL"),
+        ),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_board_id_created_at_id", "board_id", "created_at", "id"),
+        Index(
+            "ix_tasks_created_by_created_at_id",
+            "created_by",
+            "created_at",
+            "id",
+            postgresql_where=text("created_by IS NOT NULL"),
+        ),
+        Index(
+            "ix_tasks_deadline_id",
+            "deadline",
+            "id",
+            postgresql_where=text("deadline IS NOT NULL"),
+        ),
+        Index(
+            "ix_tasks_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     board_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("boards.id"),
-        index=True,
+        ForeignKey("boards.id", ondelete="CASCADE"),
         nullable=False,
     )
-    column_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("columns.id"))
+    column_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("columns.id", ondelete="CASCADE"))
 
     title: Mapped[str] = mapped_column(String)
     priority: Mapped[Priority | None] = mapped_column(
@@ -116,23 +220,54 @@ class Task(Base):
     )
     created_by: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id"), nullable=True)
+    # Maintained by triggers on subtasks, comments and attachments (migration
+    # 0010), never written by the application.
+    subtask_total: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"))
+    subtask_done: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"))
+    comment_count: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"))
+    attachment_count: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"))
+    # Generated by Postgres (migration 0007); deferred so that regular task
+    # loads do not carry it.
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     column: Mapped["Column"] = relationship(back_populates="tasks")
     board: Mapped["Board"] = relationship()
     creator: Mapped["User"] = relationship()
-    subtasks: Mapped[list["Subtask"]] = relationship(back_populates="task")
-    comments: Mapped[list["Comment"]] = relationship(back_populates="task")
-    attachments: Mapped[list["Attachment"]
-                        ] = relationship(back_populates="task")
-    assignees: Mapped[list["TaskAssignee"]
-                      ] = relationship(back_populates="task")
+    subtasks: Mapped[list["Subtask"]] = relationship(
+        back_populates="task", passive_deletes=True)
+    comments: Mapped[list["Comment"]] = relationship(
+        back_populates="task", passive_deletes=True)
+    attachments: Mapped[list["Attachment"]] = relationship(
+        back_populates="task", passive_deletes=True)
+    assignees: Mapped[list["TaskAssignee"]] = relationship(
+        back_populates="task", passive_deletes=True)
 
 
 class Subtask(Base):
     __tablename__ = "subtasks"
+    __table_args__ = (
+        Index(
+            "ix_subtasks_task_id_display_order_id",
+            "task_id",
+            "display_order",
+            "id",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    task_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("tasks.id"))
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("tasks.id", ondelete="CASCADE"))
     title: Mapped[str] = mapped_column(String)
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False)
     display_order: Mapped[int] = mapped_column(Integer)
@@ -151,15 +286,38 @@ class Subtask(Base):
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index(
+            "ix_comments_task_id_created_at_id",
+            "task_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_comments_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    task_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("tasks.id"))
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("tasks.id", ondelete="CASCADE"))
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id"), nullable=True)
     content: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now()
     )
+    # Generated by Postgres (migration 0007).
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     task: Mapped["Task"] = relationship(back_populates="comments")
     author: Mapped["User"] = relationship(back_populates="comments")
@@ -167,15 +325,33 @@ class Comment(Base):
 
 class Attachment(Base):
     __tablename__ = "attachments"
+    __table_args__ = (
+        Index(
+            "ix_attachments_task_id_uploaded_at_id",
+            "task_id",
+            "uploaded_at",
+            "id",
+        ),
+        Index(
+            "ix_attachments_content_sha256",
+            "content_sha256",
+            postgresql_where=text("content_sha256 IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    task_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("tasks.id"))
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("tasks.id", ondelete="CASCADE"))
     file_url: Mapped[str] = mapped_column(String)
     file_name: Mapped[str] = mapped_column(String)
     uploaded_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now()
     )
     uploaded_by: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
+    # Set for files uploaded through the API (migration 0011).
+    content_sha256: Mapped[str | None] = mapped_column(String(64))
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger)
+    content_type: Mapped[str | None] = mapped_column(String)
 
     task: Mapped["Task"] = relationship(back_populates="attachments")
     uploader: Mapped["User"] = relationship(back_populates="attachments")
@@ -183,9 +359,12 @@ class Attachment(Base):
 
 class TaskAssignee(Base):
     __tablename__ = "task_assignees"
+    __table_args__ = (
+        Index("ix_task_assignees_user_id_task_id", "user_id", "task_id"),
+    )
 
     task_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("tasks.id"), primary_key=True)
+        ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id"), primary_key=True)
 
@@ -195,9 +374,12 @@ class TaskAssignee(Base):
 
 class BoardMember(Base):
     __tablename__ = "board_members"
+    __table_args__ = (
+        Index("ix_board_members_user_id", "user_id"),
+    )
 
     board_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("boards.id"), primary_key=True)
+        ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id"), primary_key=True)
     role: Mapped[str] = mapped_column(String)
@@ -0,0 +1,72 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _load(python_type, value):
+    # Only what _dump produces; anything else is a tampered cursor.
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise ValueError(value)
+    if python_type in (datetime, uuid.UUID) and not isinstance(value, str):
+        raise ValueError(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([_dump(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [
+            _load(key.type.python_type, value)
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Keyset pagination: rows are ordered by `keys` (the last one must be unique)
+# and the next page starts strictly after the last row of the previous one,
+# so the cost of a page does not depend on how deep the client has scrolled.
+def paginate(stmt: Select, keys, cursor: str | None, limit: int) -> Select:
+    if cursor is not None:
+        values = decode_cursor(cursor, keys)
+        stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+
+    return stmt.order_by(*keys).limit(limit + 1)
+
+
+def page(rows, keys, limit: int) -> tuple[list, str | None]:
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, key.key) for key in keys])
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import Select, text, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app import queries
+from app.db import AsyncSessionLocal
+from app.export import comment_rows, task_rows
+from app.models import Board, Priority
+from app.pagination import DEFAULT_PAGE_SIZE, page, paginate
+from app.purge import purge_candidate
+from app.search import hit_page, task_hits
+
+
+# Wraps a statement into EXPLAIN (FORMAT JSON). Compiled like any other
+# statement, so the plan is that of the exact SQL and parameter types the
+# routers send.
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _search(q: str, board_condition) -> tuple[Select, None]:
+    stmt, _ = hit_page(task_hits(q, board_condition), q, None, DEFAULT_PAGE_SIZE)
+    return stmt, None
+
+
+def _this_week() -> dict:
+    now = datetime.now(timezone.utc)
+    return {"deadline_from": now, "deadline_to": now + timedelta(days=7)}
+
+
+# The statements of the hot paths, built by the same functions the routers
+# use from sample ids picked out of the seeded data. Statements that come with
+# keyset keys are checked on their second page, cursor condition included.
+HOT_QUERIES: list[tuple[str, Callable[[dict], tuple[Select, list | None]]]] = [
+    (
+        "board view members",
+        lambda s: (queries.board_view_members(s["board_id"]), None),
+    ),
+    (
+        "board view columns",
+        lambda s: (queries.board_view_columns(s["board_id"]), None),
+    ),
+    (
+        "board view tasks",
+        lambda s: (queries.board_view_tasks(s["board_id"]), None),
+    ),
+    (
+        "board view comments",
+        lambda s: (queries.board_view_comments([s["task_id"]]), None),
+    ),
+    (
+        "board view assignees",
+        lambda s: (queries.board_view_assignees([s["task_id"]]), None),
+    ),
+    (
+        "board view subtasks",
+        lambda s: (queries.board_view_subtasks([s["task_id"]]), None),
+    ),
+    (
+        "board overdue count",
+        lambda s: (queries.board_overdue_count(s["board_id"]), None),
+    ),
+    ("users page", lambda s: queries.users_page()),
+    ("user search", lambda s: queries.user_search_page("plan-check user 12")),
+    ("boards page", lambda s: queries.boards_page()),
+    ("board templates page", lambda s: queries.boards_page(template=True)),
+    ("column tasks page", lambda s: queries.column_tasks_page(s["column_id"])),
+    ("task comments page", lambda s: queries.task_comments_page(s["task_id"])),
+    (
+        "task attachments page",
+        lambda s: queries.task_attachments_page(s["task_id"]),
+    ),
+    ("task assignees", lambda s: (queries.task_assignees(s["task_id"]), None)),
+    ("board overdue page", lambda s: queries.board_overdue_page(s["board_id"])),
+    ("user boards", lambda s: queries.user_boards_page(s["user_id"])),
+    (
+        "user due tasks",
+        lambda s: queries.user_due_tasks_page(s["user_id"], timedelta(days=7)),
+    ),
+    ("tasks page", lambda s: queries.tasks_page()),
+    (
+        "board open tasks page",
+        lambda s: queries.tasks_page(board_id=s["board_id"], is_completed=False),
+    ),
+    ("creator tasks page", lambda s: queries.tasks_page(created_by=s["user_id"])),
+    (
+        "assignee open tasks due this week",
+        lambda s: queries.tasks_page(
+            assignee_id=s["user_id"],
+            is_completed=False,
+            priority=[Priority.high],
+            sort="deadline",
+            **_this_week(),
+        ),
+    ),
+    (
+        "tasks by deadline",
+        lambda s: queries.tasks_page(sort="deadline", **_this_week()),
+    ),
+    ("task search", lambda s: _search("task 7", true())),
+    (
+        "board task search",
+        lambda s: _search("comment 2", Board.id == s["board_id"]),
+    ),
+    ("board task export", lambda s: (task_rows(s["board_id"]), None)),
+    ("board comment export", lambda s: (comment_rows(s["board_id"]), None)),
+    ("boards pending purge", lambda s: (purge_candidate(), None)),
+]
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO users (id, name, email)
+    SELECT gen_random_uuid(), 'plan-check user ' || g,
+           'plan-check-' || g || '@example.invalid'
+    FROM generate_series(1, 2000) AS g
+    """,
+    """
+    INSERT INTO boards (id, title)
+    SELECT gen_random_uuid(), 'plan-check board ' || g
+    FROM generate_series(1, 100) AS g
+    """,
+    """
+    INSERT INTO columns (id, board_id, title, display_order)
+    SELECT gen_random_uuid(), b.id, 'column ' || g, g
+    FROM boards b CROSS JOIN generate_series(1, 4) AS g
+    WHERE b.title LIKE 'plan-check board %'
+    """,
+    """
+    INSERT INTO tasks (
+        id, board_id, column_id, title, display_order,
+        is_completed, color, deadline, completed_at
+    )
+    SELECT gen_random_uuid(), c.board_id, c.id, 'task ' || g, g,
+           g % 3 = 0, '#FFF',
+           now() + (g - 12) * interval '1 day',
+           CASE WHEN g % 3 = 0 THEN now() END
+    FROM columns c
+    JOIN boards b ON b.id = c.board_id
+    CROSS JOIN generate_series(1, 25) AS g
+    WHERE b.title LIKE 'plan-check board %'
+    """,
+    """
+    INSERT INTO subtasks (id, task_id, title, is_completed, display_order)
+    SELECT gen_random_uuid(), t.id, 'subtask ' || g, g = 1, g
+    FROM tasks t
+    JOIN boards b ON b.id = t.board_id
+    CROSS JOIN generate_series(1, 2) AS g
+    WHERE b.title LIKE 'plan-check board %'
+    """,
+    """
+    INSERT INTO comments (id, task_id, content)
+    SELECT gen_random_uuid(), t.id, 'comment ' || g
+    FROM tasks t
+    JOIN boards b ON b.id = t.board_id
+    CROSS JOIN generate_series(1, 3) AS g
+    WHERE b.title LIKE 'plan-check board %'
+    """,
+    """
+    WITH seeded_users AS (
+        SELECT array_agg(id) AS ids FROM users
+        WHERE email LIKE 'plan-check-%@example.invalid'
+    )
+    INSERT INTO attachments (id, task_id, file_url, file_name, uploaded_by)
+    SELECT gen_random_uuid(), t.id, 'file://plan-check', 'plan-check.txt',
+           u.ids[1 + abs(hashtext(t.id::text)::bigint) % cardinality(u.ids)]
+    FROM tasks t
+    JOIN boards b ON b.id = t.board_id
+    CROSS JOIN seeded_users u
+    WHERE b.title LIKE 'plan-check board %'
+    """,
+    """
+    WITH seeded_users AS (
+        SELECT array_agg(id) AS ids FROM users
+        WHERE email LIKE 'plan-check-%@example.invalid'
+    )
+    INSERT INTO task_assignees (task_id, user_id)
+    SELECT t.id,
+           u.ids[1 + abs(hashtext(t.id::text)::bigint) % cardinality(u.ids)]
+    FROM tasks t
+    JOIN boards b ON b.id = t.board_id
+    CROSS JOIN seeded_users u
+    WHERE b.title LIKE 'plan-check board %'
+    """,
+    """
+    WITH seeded_users AS (
+        SELECT array_agg(id) AS ids FROM users
+        WHERE email LIKE 'plan-check-%@example.invalid'
+    )
+    INSERT INTO board_members (board_id, user_id, role)
+    SELECT b.id,
+           u.ids[1 + (abs(hashtext(b.id::text)::bigint) + g) % cardinality(u.ids)],
+           'member'
+    FROM boards b
+    CROSS JOIN seeded_users u
+    CROSS JOIN generate_series(1, 10) AS g
+    WHERE b.title LIKE 'plan-check board %'
+    """,
+]
+
+SEEDED_TABLES = [
+    "users", "boards", "columns", "tasks", "subtasks",
+    "comments", "attachments", "task_assignees", "board_members",
+]
+
+
+def find_seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+async def pick_samples(db: AsyncSession) -> dict:
+    result = await db.execute(
+        text(
+            """
+            SELECT b.id AS board_id, c.id AS column_id, t.id AS task_id,
+                   ta.user_id AS user_id
+            FROM boards b
+            JOIN columns c ON c.board_id = b.id
+            JOIN tasks t ON t.column_id = c.id
+            JOIN task_assignees ta ON ta.task_id = t.id
+            WHERE b.title LIKE 'plan-check board %'
+            LIMIT 1
+            """
+        )
+    )
+    return dict(result.mappings().one())
+
+
+# The cursor comes from a real first page, so it has the types and values
+# the routers would hand out.
+async def second_page(db: AsyncSession, stmt: Select, keys: list) -> Select:
+    result = await db.execute(paginate(stmt, keys, None, 1))
+    # Like in the routers: a single ORM entity is read off as objects, any
+    # other select as rows.
+    rows = result.scalars() if len(result.keys()) == 1 else result.all()
+    _, cursor = page(rows, keys, 1)
+    return paginate(stmt, keys, cursor, DEFAULT_PAGE_SIZE)
+
+
+async def check_plans() -> list[tuple[str, list[str]]]:
+    failures = []
+    async with AsyncSessionLocal() as db:
+        # Everything, including the seed data, is rolled back at the end, so
+        # the check can run against any database that has the schema applied.
+        try:
+            for statement in SEED_STATEMENTS:
+                await db.execute(text(statement))
+            for table in SEEDED_TABLES:
+                await db.execute(text(f"ANALYZE {table}"))
+
+            samples = await pick_samples(db)
+
+            # With sequential scans priced out the planner only picks one when
+            # no index can serve the query at all.
+            await db.execute(text("SET LOCAL enable_seqscan = off"))
+
+            for name, build in HOT_QUERIES:
+                stmt, keys = build(samples)
+                if keys is not None:
+                    stmt = await second_page(db, stmt, keys)
+                raw_plan = await db.scalar(Explain(stmt))
+                plan = json.loads(raw_plan)[0]["Plan"]
+                seq_scans = find_seq_scans(plan)
+                if seq_scans:
+                    failures.append((name, seq_scans))
+        finally:
+            await db.rollback()
+
+    return failures
+
+
+def main() -> int:
+    failures = asyncio.run(check_plans())
+    for name, relations in failures:
+        print(f"FAIL {name}: sequential scan on {', '.join(relations)}")
+    if failures:
+        return 1
+    print(f"OK {len(HOT_QUERIES)} hot queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
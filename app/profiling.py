@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from app.dependencies.admin import ADMIN_TOKEN, is_admin_token
+from app.sqlstats import route_of
+
+# Share of all requests profiled without being asked to, 0 to 1.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "50"))
+
+# Off by default so that requests do not pass through the profiler at all
+# (see app.main). On-demand profiles also need ADMIN_TOKEN to be set.
+PROFILING_ENABLED = os.getenv("PROFILING", "0") == "1"
+
+PROFILE_HEADER = b"x-profile"
+WAITING = "[waiting]"
+
+
+def _label(frame) -> str:
+    module = frame.f_globals.get("__name__", frame.f_code.co_filename)
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _frames_outermost_first(frame) -> list:
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _await_chain(task: asyncio.Task) -> list:
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(
+            awaitable, "gi_frame", None
+        )
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(
+            awaitable, "gi_yieldfrom", None
+        )
+    return frames
+
+
+# Samples one task from a background thread. While the task runs, the event
+# loop thread's stack is recorded (Python work, including SQLAlchemy's
+# greenlets); while it is suspended, the chain of coroutines it awaits on is
+# recorded under a [waiting] leaf, which is where database round trips show
+# up. Time the loop spends on other requests is not attributed to this one.
+class TaskSampler:
+    def __init__(
+        self,
+        task: asyncio.Task,
+        interval: float = PROFILE_INTERVAL_SECONDS,
+    ):
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> tuple | None:
+        chain = _await_chain(self.task)
+        if not chain:
+            return None
+
+        if asyncio.current_task(self.loop) is not self.task:
+            return tuple(_label(frame) for frame in chain) + (WAITING,)
+
+        running = _frames_outermost_first(
+            sys._current_frames().get(self.thread_id)
+        )
+        root = chain[0]
+        if root in running:
+            frames = running[running.index(root):]
+        else:
+            # Inside a greenlet the thread's stack starts at the greenlet;
+            # the coroutines that spawned it come first.
+            frames = chain + running
+        return tuple(_label(frame) for frame in frames)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            try:
+                stack = self._sample()
+            except (RuntimeError, ValueError):
+                # The task moved on while its frames were being read.
+                continue
+            # CPU-bound code holds the GIL for up to sys.getswitchinterval(),
+            # delaying the next sample; weighting by the time since the last
+            # one keeps it from being under-counted against waiting.
+            now = time.perf_counter()
+            weight = max(1, round((now - last) / self.interval))
+            last = now
+            if stack is not None:
+                self.stacks[stack] += weight
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+
+class ProfileStore:
+    def __init__(self, size: int = PROFILE_STORE_SIZE):
+        self.entries: deque[dict] = deque(maxlen=size)
+        self.ids = itertools.count(1)
+
+    def get(self, profile_id: int) -> dict | None:
+        for entry in self.entries:
+            if entry["id"] == profile_id:
+                return entry
+        return None
+
+    def recent(self, limit: int) -> list[dict]:
+        return list(itertools.islice(reversed(self.entries), limit))
+
+
+profiles = ProfileStore()
+
+
+def _wants_profile(scope) -> bool:
+    # Scanned in place; only profiled requests look up the token.
+    if ADMIN_TOKEN and any(
+        name == PROFILE_HEADER for name, _ in scope["headers"]
+    ):
+        token = next(
+            (
+                value
+                for name, value in scope["headers"]
+                if name == b"x-admin-token"
+            ),
+            b"",
+        )
+        return is_admin_token(token.decode("latin-1"))
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+# Profiles requests sent with an X-Profile header and a valid X-Admin-Token,
+# plus a PROFILE_SAMPLE_RATE share of all requests. Profiles are kept as
+# collapsed stacks (the input format of flamegraph tools) and listed under
+# /admin/profiles; a profiled response carries its id in X-Profile-Id.
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = next(profiles.ids)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-profile-id", str(profile_id).encode()),
+                ]
+            await send(message)
+
+        sampler = TaskSampler(asyncio.current_task())
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            profiles.entries.append({
+                "id": profile_id,
+                "at": started_at,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_of(scope),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "samples": sum(sampler.stacks.values()),
+                "collapsed": sampler.collapsed(),
+            })
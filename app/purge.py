@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import uuid
+
+from sqlalchemy import Select, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.blobs import delete_if_unreferenced
+from app.db import AsyncSessionLocal
+from app.models import (
+    Attachment,
+    Board,
+    BoardMember,
+    Column,
+    Comment,
+    Subtask,
+    Task,
+    TaskAssignee,
+)
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+# Boards with more tasks than this are soft-deleted and purged in the
+# background instead of being removed by a single cascading DELETE.
+PURGE_THRESHOLD = int(os.getenv("BOARD_PURGE_THRESHOLD", "500"))
+PURGE_BATCH_SIZE = int(os.getenv("BOARD_PURGE_BATCH_SIZE", "500"))
+PURGE_INTERVAL_SECONDS = float(os.getenv("BOARD_PURGE_INTERVAL_SECONDS", "5"))
+PURGE_WORKER_ENABLED = os.getenv("BOARD_PURGE_WORKER", "1") == "1"
+
+
+async def _delete_in_chunks(db: AsyncSession, model, task_ids: list) -> None:
+    while True:
+        chunk = (
+            select(model.id)
+            .where(model.task_id.in_(task_ids))
+            .limit(PURGE_BATCH_SIZE)
+            .scalar_subquery()
+        )
+        result = await db.execute(delete(model).where(model.id.in_(chunk)))
+        if result.rowcount < PURGE_BATCH_SIZE:
+            return
+
+
+def purge_candidate() -> Select:
+    return (
+        select(Board.id)
+        .where(Board.deleted_at.is_not(None))
+        .order_by(Board.deleted_at)
+        .limit(1)
+    )
+
+
+# Purges one batch of tasks from the oldest soft-deleted board and returns
+# its id, or None when there is nothing left to purge. Each batch is one
+# transaction that keeps the board row locked until its deletes are
+# committed, so workers in other processes skip to different boards. Blobs of
+# the purged attachments are removed afterwards like on any attachment delete.
+async def purge_next_chunk() -> uuid.UUID | None:
+    async with AsyncSessionLocal() as db:
+        board_id = await db.scalar(
+            purge_candidate().with_for_update(skip_locked=True)
+        )
+        if board_id is None:
+            return None
+
+        task_ids = (
+            await db.execute(
+                select(Task.id)
+                .where(Task.board_id == board_id)
+                .limit(PURGE_BATCH_SIZE)
+            )
+        ).scalars().all()
+
+        if not task_ids:
+            await db.execute(delete(BoardMember).where(BoardMember.board_id == board_id))
+            await db.execute(delete(Column).where(Column.board_id == board_id))
+            await db.execute(delete(Board).where(Board.id == board_id))
+            await db.commit()
+
+            logger.info("purged board %s", board_id)
+            return board_id
+
+        blobs = (
+            await db.execute(
+                select(Attachment.content_sha256)
+                .where(
+                    Attachment.task_id.in_(task_ids),
+                    Attachment.content_sha256.is_not(None),
+                )
+                .distinct()
+            )
+        ).scalars().all()
+
+        for model in (Comment, Subtask, Attachment):
+            await _delete_in_chunks(db, model, task_ids)
+
+        await db.execute(
+            delete(TaskAssignee).where(TaskAssignee.task_id.in_(task_ids))
+        )
+        await db.execute(delete(Task).where(Task.id.in_(task_ids)))
+        await db.commit()
+
+    for sha256 in blobs:
+        await delete_if_unreferenced(storage, sha256)
+    return board_id
+
+
+async def run_purge_worker() -> None:
+    while True:
+        try:
+            while await purge_next_chunk() is not None:
+                # Give request handlers a chance to run between chunks.
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("board purge failed")
+
+        await asyncio.sleep(PURGE_INTERVAL_SECONDS)
@@ -0,0 +1,272 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import Select, func, literal, select, union
+
+from app.models import (
+    Attachment,
+    Board,
+    BoardMember,
+    Column,
+    Comment,
+    Priority,
+    Subtask,
+    Task,
+    TaskAssignee,
+    User,
+)
+from app.search import user_match
+
+# Statements of the hot read paths. The routers build their queries here and
+# app.plan_check explains the very same statements, so the check cannot drift
+# from what is actually run. List statements come with the keys they are
+# paginated by.
+
+
+def board_view_members(board_id: uuid.UUID) -> Select:
+    return (
+        select(
+            BoardMember.user_id,
+            User.name,
+            BoardMember.role,
+        )
+        .join(User, User.id == BoardMember.user_id)
+        .where(BoardMember.board_id == board_id)
+    )
+
+
+def board_view_columns(board_id: uuid.UUID) -> Select:
+    return (
+        select(Column)
+        .where(Column.board_id == board_id)
+        .order_by(Column.display_order)
+    )
+
+
+def board_view_tasks(board_id: uuid.UUID) -> Select:
+    return (
+        select(Task)
+        .where(Task.board_id == board_id)
+        .order_by(Task.display_order)
+    )
+
+
+def board_view_comments(task_ids: list[uuid.UUID]) -> Select:
+    return (
+        select(Comment)
+        .where(Comment.task_id.in_(task_ids))
+        .order_by(Comment.created_at)
+    )
+
+
+def board_view_assignees(task_ids: list[uuid.UUID]) -> Select:
+    return (
+        select(
+            TaskAssignee.task_id,
+            User.id,
+            User.name,
+        )
+        .join(User, User.id == TaskAssignee.user_id)
+        .where(TaskAssignee.task_id.in_(task_ids))
+    )
+
+
+def board_view_subtasks(task_ids: list[uuid.UUID]) -> Select:
+    return (
+        select(Subtask)
+        .where(Subtask.task_id.in_(task_ids))
+        .order_by(Subtask.display_order)
+    )
+
+
+# Counted from the partial index on open tasks (migration 0009), so completed
+# tasks do not add to the cost.
+def board_overdue_count(board_id: uuid.UUID) -> Select:
+    return (
+        select(func.count())
+        .select_from(Task)
+        .where(
+            Task.board_id == board_id,
+            Task.completed_at.is_(None),
+            Task.deadline < func.now(),
+        )
+    )
+
+
+def users_page() -> tuple[Select, list]:
+    return select(User), [User.created_at, User.id]
+
+
+def user_search_page(q: str) -> tuple[Select, list]:
+    condition, rank = user_match(q)
+    stmt = select(
+        User.id,
+        User.name,
+        User.email,
+        User.avatar_url,
+        rank,
+    ).where(condition)
+    return stmt, [rank, User.id]
+
+
+def boards_page(template: bool = False) -> tuple[Select, list]:
+    stmt = select(Board).where(
+        Board.deleted_at.is_(None),
+        Board.is_template.is_(template),
+    )
+    return stmt, [Board.created_at, Board.id]
+
+
+def column_tasks_page(column_id: uuid.UUID) -> tuple[Select, list]:
+    stmt = select(Task).where(Task.column_id == column_id)
+    return stmt, [Task.display_order, Task.id]
+
+
+def task_comments_page(task_id: uuid.UUID) -> tuple[Select, list]:
+    stmt = select(Comment).where(Comment.task_id == task_id)
+    return stmt, [Comment.created_at, Comment.id]
+
+
+def task_attachments_page(task_id: uuid.UUID) -> tuple[Select, list]:
+    stmt = select(Attachment).where(Attachment.task_id == task_id)
+    return stmt, [Attachment.uploaded_at, Attachment.id]
+
+
+def task_assignees(task_id: uuid.UUID) -> Select:
+    return select(TaskAssignee).where(TaskAssignee.task_id == task_id)
+
+
+# A range scan over the partial index on open tasks, oldest deadline first.
+def board_overdue_page(board_id: uuid.UUID) -> tuple[Select, list]:
+    stmt = select(Task).where(
+        Task.board_id == board_id,
+        Task.completed_at.is_(None),
+        Task.deadline < func.now(),
+    )
+    return stmt, [Task.deadline, Task.id]
+
+
+def user_board_ids(user_id: uuid.UUID):
+    return union(
+        select(Board.id).where(Board.owner_id == user_id),
+        select(BoardMember.board_id).where(BoardMember.user_id == user_id),
+    )
+
+
+def user_boards_page(user_id: uuid.UUID) -> tuple[Select, list]:
+    # Served by the partial index on open tasks, so boards with a long
+    # history of completed tasks cost the same as fresh ones.
+    overdue_count = (
+        select(func.count())
+        .where(
+            Task.board_id == Board.id,
+            Task.completed_at.is_(None),
+            Task.deadline < func.now(),
+        )
+        .scalar_subquery()
+    )
+
+    stmt = (
+        select(
+            Board.id,
+            Board.title,
+            Board.owner_id,
+            Board.is_template,
+            Board.created_at,
+            Board.updated_at,
+            Board.task_count,
+            Board.open_task_count,
+            overdue_count.label("overdue_count"),
+            func.coalesce(
+                BoardMember.role,
+                literal("owner"),
+            ).label("role"),
+        )
+        .outerjoin(
+            BoardMember,
+            (BoardMember.board_id == Board.id)
+            & (BoardMember.user_id == user_id),
+        )
+        .where(
+            Board.id.in_(user_board_ids(user_id)),
+            Board.deleted_at.is_(None),
+        )
+    )
+    return stmt, [Board.created_at, Board.id]
+
+
+# Open tasks assigned to the user whose deadline falls in the next `within`,
+# soonest first. Overdue tasks are listed per board.
+def user_due_tasks_page(
+    user_id: uuid.UUID,
+    within: timedelta,
+) -> tuple[Select, list]:
+    stmt = (
+        select(Task)
+        .join(
+            TaskAssignee,
+            (TaskAssignee.task_id == Task.id)
+            & (TaskAssignee.user_id == user_id),
+        )
+        .join(Board, Board.id == Task.board_id)
+        .where(
+            Task.completed_at.is_(None),
+            Task.deadline >= func.now(),
+            Task.deadline < func.now() + within,
+            Board.deleted_at.is_(None),
+        )
+    )
+    return stmt, [Task.deadline, Task.id]
+
+
+# Keyset for each sort order of GET /tasks, all backed by the indexes from
+# migration 0008.
+TASK_SORT_KEYS = {
+    "created_at": [Task.created_at, Task.id],
+    "deadline": [Task.deadline, Task.id],
+}
+
+
+def tasks_page(
+    board_id: uuid.UUID | None = None,
+    column_id: uuid.UUID | None = None,
+    assignee_id: uuid.UUID | None = None,
+    created_by: uuid.UUID | None = None,
+    priority: list[Priority] | None = None,
+    is_completed: bool | None = None,
+    deadline_from: datetime | None = None,
+    deadline_to: datetime | None = None,
+    sort: str = "created_at",
+) -> tuple[Select, list]:
+    stmt = (
+        select(Task)
+        .join(Board, Board.id == Task.board_id)
+        .where(Board.deleted_at.is_(None))
+    )
+
+    if board_id is not None:
+        stmt = stmt.where(Task.board_id == board_id)
+    if column_id is not None:
+        stmt = stmt.where(Task.column_id == column_id)
+    if assignee_id is not None:
+        stmt = stmt.join(
+            TaskAssignee,
+            (TaskAssignee.task_id == Task.id)
+            & (TaskAssignee.user_id == assignee_id),
+        )
+    if created_by is not None:
+        stmt = stmt.where(Task.created_by == created_by)
+    if priority:
+        stmt = stmt.where(Task.priority.in_(priority))
+    if is_completed is not None:
+        stmt = stmt.where(Task.is_completed.is_(is_completed))
+    if deadline_from is not None:
+        stmt = stmt.where(Task.deadline >= deadline_from)
+    if deadline_to is not None:
+        stmt = stmt.where(Task.deadline < deadline_to)
+
+    # Tasks without a deadline have no place in deadline order.
+    if sort == "deadline":
+        stmt = stmt.where(Task.deadline.is_not(None))
+
+    return stmt, TASK_SORT_KEYS[sort]
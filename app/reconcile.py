@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+
+from app.db import connect_raw
+
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "1000"))
+
+# Each statement recounts one batch of parent rows and rewrites only the
+# counters that drifted. The parents are locked first, so a concurrent child
+# write either is counted here or applies its trigger delta afterwards.
+TASK_COUNTERS_SQL = """
+WITH batch AS (
+    SELECT id FROM tasks WHERE id > $1 ORDER BY id LIMIT $2 FOR UPDATE
+), expected AS (
+    SELECT b.id,
+           (SELECT count(*) FROM subtasks s
+            WHERE s.task_id = b.id) AS subtask_total,
+           (SELECT count(*) FROM subtasks s
+            WHERE s.task_id = b.id AND s.is_completed) AS subtask_done,
+           (SELECT count(*) FROM comments c
+            WHERE c.task_id = b.id) AS comment_count,
+           (SELECT count(*) FROM attachments a
+            WHERE a.task_id = b.id) AS attachment_count
+    FROM batch b
+), fixed AS (
+    UPDATE tasks t
+    SET subtask_total = e.subtask_total,
+        subtask_done = e.subtask_done,
+        comment_count = e.comment_count,
+        attachment_count = e.attachment_count
+    FROM expected e
+    WHERE t.id = e.id
+      AND (t.subtask_total, t.subtask_done, t.comment_count, t.attachment_count)
+          IS DISTINCT FROM
+          (e.subtask_total, e.subtask_done, e.comment_count, e.attachment_count)
+      AND $3
+    RETURNING t.id
+)
+SELECT (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id,
+       (SELECT count(*) FROM expected e JOIN tasks t ON t.id = e.id
+        WHERE (t.subtask_total, t.subtask_done, t.comment_count, t.attachment_count)
+              IS DISTINCT FROM
+              (e.subtask_total, e.subtask_done, e.comment_count, e.attachment_count)
+       ) AS drifted
+"""
+
+BOARD_COUNTERS_SQL = """
+WITH batch AS (
+    SELECT id FROM boards WHERE id > $1 ORDER BY id LIMIT $2 FOR UPDATE
+), expected AS (
+    SELECT b.id,
+           (SELECT count(*) FROM tasks t
+            WHERE t.board_id = b.id) AS task_count,
+           (SELECT count(*) FROM tasks t
+            WHERE t.board_id = b.id AND t.completed_at IS NULL) AS open_task_count
+    FROM batch b
+), fixed AS (
+    UPDATE boards bo
+    SET task_count = e.task_count,
+        open_task_count = e.open_task_count
+    FROM expected e
+    WHERE bo.id = e.id
+      AND (bo.task_count, bo.open_task_count)
+          IS DISTINCT FROM (e.task_count, e.open_task_count)
+      AND $3
+    RETURNING bo.id
+)
+SELECT (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id,
+       (SELECT count(*) FROM expected e JOIN boards bo ON bo.id = e.id
+        WHERE (bo.task_count, bo.open_task_count)
+              IS DISTINCT FROM (e.task_count, e.open_task_count)
+       ) AS drifted
+"""
+
+COUNTERS = [
+    ("task counters", TASK_COUNTERS_SQL),
+    ("board counters", BOARD_COUNTERS_SQL),
+]
+
+
+async def _reconcile_table(conn, sql: str, repair: bool) -> int:
+    drifted = 0
+    last_id = uuid.UUID(int=0)
+    while True:
+        async with conn.transaction():
+            row = await conn.fetchrow(sql, last_id, RECONCILE_BATCH_SIZE, repair)
+        if row["last_id"] is None:
+            return drifted
+        drifted += row["drifted"]
+        last_id = row["last_id"]
+
+
+async def reconcile(
+    repair: bool = True,
+    only: set[str] | None = None,
+) -> list[tuple[str, int]]:
+    conn = await connect_raw()
+    try:
+        return [
+            (name, await _reconcile_table(conn, sql, repair))
+            for name, sql in COUNTERS
+            if only is None or name in only
+        ]
+    finally:
+        await conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Recount the trigger-maintained counters and repair drift."
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report drifted rows, exit with 1 if there are any",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(reconcile(repair=not args.check))
+    for name, drifted in results:
+        verb = "drifted" if args.check else "repaired"
+        print(f"{name}: {drifted} rows {verb}")
+
+    if args.check and any(drifted for _, drifted in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.events import publish
+from app.models import Board, Column, Task
+from app.schemas import BoardReorderPayload, ColumnReorderPayload
+from app.transaction import run_in_transaction
+from app.workflow import column_transition_values
+
+# Reorders of one board that arrive within this many seconds of each other
+# are written as a single transaction.
+REORDER_COALESCE_WINDOW = float(os.getenv("REORDER_COALESCE_WINDOW", "0.15"))
+
+
+# Raises the HTTPException a reorder of the board would fail with, and
+# returns the ids of the board's columns otherwise.
+async def check_reorder(
+    db: AsyncSession,
+    board_id: uuid.UUID,
+    payload: BoardReorderPayload,
+) -> set[uuid.UUID]:
+    board_result = await db.execute(
+        select(Board).where(
+            Board.id == board_id,
+            Board.deleted_at.is_(None),
+        )
+    )
+    board = board_result.scalar_one_or_none()
+    if board is None:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    columns_result = await db.execute(
+        select(Column.id).where(Column.board_id == board_id)
+    )
+    board_column_ids = {row.id for row in columns_result.all()}
+
+    for col in payload.columns:
+        if col.column_id not in board_column_ids:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Column {col.column_id} does not belong to board {board_id}",
+            )
+
+    all_task_ids = []
+    for col in payload.columns:
+        all_task_ids.extend(col.task_ids)
+
+    tasks_check = await db.execute(
+        select(Task.id).where(
+            Task.id.in_(all_task_ids),
+            Task.board_id == board_id,
+        )
+    )
+    if len(tasks_check.scalars().all()) != len(all_task_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="Some tasks do not belong to this board",
+        )
+
+    if len(all_task_ids) != len(set(all_task_ids)):
+        raise HTTPException(
+            status_code=400,
+            detail="Duplicate task_ids in reorder payload",
+        )
+
+    return board_column_ids
+
+
+async def apply_reorder(
+    db: AsyncSession,
+    board_id: uuid.UUID,
+    payload: BoardReorderPayload,
+) -> dict:
+    board_column_ids = await check_reorder(db, board_id, payload)
+    all_task_ids = [
+        task_id for col in payload.columns for task_id in col.task_ids
+    ]
+
+    tasks_before_result = await db.execute(
+        select(Task.id, Task.column_id)
+        .where(Task.id.in_(all_task_ids))
+    )
+    task_old_column: dict[uuid.UUID, uuid.UUID] = {
+        row.id: row.column_id for row in tasks_before_result.all()
+    }
+
+    columns_titles_result = await db.execute(
+        select(Column.id, Column.title)
+        .where(Column.id.in_(board_column_ids))
+    )
+    column_titles: dict[uuid.UUID, str] = {
+        row.id: row.title for row in columns_titles_result.all()
+    }
+
+    affected_column_ids = {col.column_id for col in payload.columns}
+
+    await db.execute(
+        update(Task)
+        .where(Task.column_id.in_(affected_column_ids))
+        .values(display_order=Task.display_order + 1000)
+    )
+
+    for col in payload.columns:
+        for index, task_id in enumerate(col.task_ids):
+            old_column_id = task_old_column.get(task_id)
+            new_column_id = col.column_id
+
+            old_title = column_titles.get(old_column_id)
+            new_title = column_titles.get(new_column_id)
+
+            values: dict = {
+                "column_id": new_column_id,
+                "display_order": index,
+                **column_transition_values(old_title, new_title),
+            }
+
+            await db.execute(
+                update(Task)
+                .where(Task.id == task_id)
+                .values(**values)
+            )
+
+    await publish(db, board_id, "board.reordered")
+
+    return {"ok": True}
+
+
+# Folds a newer reorder into an older one, giving the board state after both
+# requests. Columns listed in the newer payload replace the older lists, and
+# tasks it places are dropped from the columns it does not mention. Tasks the
+# older payload put into a column the newer one re-lists without them stay in
+# that column, after the newer tasks, as if both had been applied in turn.
+def merge_reorders(
+    older: BoardReorderPayload,
+    newer: BoardReorderPayload,
+) -> BoardReorderPayload:
+    newer_tasks = {task_id for col in newer.columns for task_id in col.task_ids}
+    older_lists = {col.column_id: col.task_ids for col in older.columns}
+    newer_columns = {col.column_id for col in newer.columns}
+
+    columns = [
+        ColumnReorderPayload(
+            column_id=col.column_id,
+            task_ids=[t for t in col.task_ids if t not in newer_tasks],
+        )
+        for col in older.columns
+        if col.column_id not in newer_columns
+    ]
+    columns.extend(
+        ColumnReorderPayload(
+            column_id=col.column_id,
+            task_ids=col.task_ids + [
+                t for t in older_lists.get(col.column_id, [])
+                if t not in newer_tasks
+            ],
+        )
+        for col in newer.columns
+    )
+
+    return BoardReorderPayload(columns=columns)
+
+
+@dataclass
+class _PendingReorder:
+    payload: BoardReorderPayload
+    requests: list[tuple[BoardReorderPayload, asyncio.Future]] = field(
+        default_factory=list
+    )
+
+
+def _answer(waiter: asyncio.Future, result=None, exc=None) -> None:
+    if waiter.done():
+        return
+    if exc is not None:
+        waiter.set_exception(exc)
+    else:
+        waiter.set_result(result)
+
+
+# Collects the reorders of each board for a short window and applies only the
+# merged final state. Each reorder is checked against the board before it is
+# merged, so an invalid one is rejected to its own sender. At most one reorder
+# transaction per board is in flight in this process; requests arriving
+# meanwhile are collected for the next one.
+class ReorderCoalescer:
+    def __init__(self, window: float = REORDER_COALESCE_WINDOW):
+        self.window = window
+        self.pending: dict[uuid.UUID, _PendingReorder] = {}
+        self.workers: dict[uuid.UUID, asyncio.Task] = {}
+
+    async def submit(
+        self,
+        board_id: uuid.UUID,
+        payload: BoardReorderPayload,
+    ) -> dict:
+        async def check(db: AsyncSession) -> set[uuid.UUID]:
+            return await check_reorder(db, board_id, payload)
+
+        await run_in_transaction(check)
+
+        pending = self.pending.get(board_id)
+        if pending is None:
+            pending = self.pending[board_id] = _PendingReorder(payload)
+        else:
+            pending.payload = merge_reorders(pending.payload, payload)
+
+        waiter = asyncio.get_running_loop().create_future()
+        pending.requests.append((payload, waiter))
+
+        if board_id not in self.workers:
+            self.workers[board_id] = asyncio.create_task(self._drain(board_id))
+
+        # A client that goes away must not cancel the write for the others.
+        return await asyncio.shield(waiter)
+
+    async def _drain(self, board_id: uuid.UUID) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                pending = self.pending.pop(board_id, None)
+                if pending is None:
+                    return
+                await self._apply(board_id, pending)
+        finally:
+            del self.workers[board_id]
+
+    async def _write(
+        self,
+        board_id: uuid.UUID,
+        payload: BoardReorderPayload,
+    ) -> dict:
+        async def work(db: AsyncSession) -> dict:
+            return await apply_reorder(db, board_id, payload)
+
+        return await run_in_transaction(work, isolation_level="SERIALIZABLE")
+
+    async def _apply(self, board_id: uuid.UUID, pending: _PendingReorder) -> None:
+        try:
+            result = await self._write(board_id, pending.payload)
+        except HTTPException:
+            # The board changed since the reorders were checked, e.g. a task
+            # was deleted. Writing them one by one fails only the stale ones.
+            for payload, waiter in pending.requests:
+                try:
+                    result = await self._write(board_id, payload)
+                except Exception as exc:
+                    _answer(waiter, exc=exc)
+                else:
+                    _answer(waiter, {**result, "coalesced": 1})
+            return
+        except Exception as exc:
+            for _, waiter in pending.requests:
+                _answer(waiter, exc=exc)
+            return
+
+        for _, waiter in pending.requests:
+            _answer(waiter, {**result, "coalesced": len(pending.requests)})
+
+
+reorders = ReorderCoalescer()
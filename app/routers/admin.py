@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.dependencies.admin import require_admin
+from app.profiling import profiles
+from app.schemas import ProfileSummary, SlowQuery
+from app.slowlog import slow_queries
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/slow-queries", response_model=list[SlowQuery])
+async def list_slow_queries(limit: int = Query(50, ge=1, le=500)):
+    return slow_queries.recent(limit)
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries():
+    slow_queries.clear()
+    return {"ok": True}
+
+
+@router.get("/profiles", response_model=list[ProfileSummary])
+async def list_profiles(limit: int = Query(50, ge=1, le=500)):
+    return profiles.recent(limit)
+
+
+# Collapsed stacks, one "frame;frame;frame count" line per stack, ready for
+# flamegraph.pl or speedscope.
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: int):
+    entry = profiles.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return entry["collapsed"]
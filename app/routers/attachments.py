@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request,
+)
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func
+from sqlalchemy.exc import IntegrityError
 import uuid
 from app.models import Attachment as AttachmentModel
-from app.schemas import Attachment, AttachmentCreate
+from app.models import Task
+from app.schemas import Attachment, AttachmentCreate, Page
 from app.dependencies.db import get_db
+from app.dependencies.storage import get_storage
+from app import queries
+from app.blobs import delete_if_unreferenced, lock_blob
+from app.events import publish, task_board
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.storage import FileTooLarge, Storage
+from app.thumbnails import is_image, thumbnails
+from app.transaction import TransactionalRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 
 @router.post("/", response_model=Attachment)
@@ -17,35 +30,207 @@ async def create_attachment(
     obj = AttachmentModel(**data.model_dump())
     db.add(obj)
 
-    await db.commit()
+    await db.flush()
     await db.refresh(obj)
 
+    await publish(
+        db, task_board(obj.task_id), "attachment.created",
+        task_id=obj.task_id, attachment_id=obj.id,
+    )
+
     return obj
 
 
-@router.get("/task/{task_id}", response_model=list[Attachment])
-async def list_attachments(
+@router.get("/thumbnails/metrics")
+async def thumbnail_metrics():
+    return thumbnails.metrics()
+
+
+@router.post("/task/{task_id}/upload", response_model=Attachment)
+async def upload_attachment(
     task_id: uuid.UUID,
+    request: Request,
+    file_name: str = Query(..., min_length=1, max_length=255),
+    uploaded_by: uuid.UUID = Query(...),
     db: AsyncSession = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
+    # The raw body is streamed to storage before the first query, so no
+    # database connection is held while the client uploads. It can only be
+    # read once, and the handler is replayed when its transaction is retried,
+    # so the received file is kept for the next attempt.
+    stored = getattr(request.state, "upload", None)
+    if stored is None:
+        try:
+            stored = await storage.receive(request.stream())
+        except FileTooLarge:
+            raise HTTPException(status_code=413, detail="Attachment too large")
+        request.state.upload = stored
+
+    task_exists = await db.scalar(
+        select(func.count()).select_from(Task).where(Task.id == task_id)
+    )
+    if not task_exists:
+        await storage.discard(stored)
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    await lock_blob(db, stored.sha256)
+
+    attachment_id = uuid.uuid4()
+    obj = AttachmentModel(
+        id=attachment_id,
+        task_id=task_id,
+        file_name=file_name,
+        file_url=f"/attachments/{attachment_id}/content",
+        uploaded_by=uploaded_by,
+        content_sha256=stored.sha256,
+        size_bytes=stored.size,
+        content_type=request.headers.get("content-type"),
+    )
+    db.add(obj)
+
+    try:
+        await db.flush()
+    except IntegrityError:
+        await storage.discard(stored)
+        raise HTTPException(status_code=400, detail="Cannot attach file to task")
+
+    await storage.persist(stored)
+    if is_image(obj.content_type):
+        thumbnails.enqueue(stored.sha256)
+
+    await db.refresh(obj)
+
+    await publish(
+        db, task_board(obj.task_id), "attachment.created",
+        task_id=obj.task_id, attachment_id=obj.id,
+    )
+
+    return obj
+
+
+@router.get("/{attachment_id}/content")
+async def download_attachment(
+    attachment_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    storage: Storage = Depends(get_storage),
 ):
     result = await db.execute(
-        select(AttachmentModel).where(
-            AttachmentModel.task_id == task_id
+        select(AttachmentModel).where(AttachmentModel.id == attachment_id)
+    )
+    obj = result.scalar_one_or_none()
+
+    if obj is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+
+    if obj.content_sha256 is None:
+        return RedirectResponse(obj.file_url)
+
+    # A blob lost on disk would otherwise fail inside FileResponse.
+    path = storage.path(obj.content_sha256)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Attachment file not found")
+
+    # FileResponse answers Range requests and hands the file to the server's
+    # zero-copy send path where one is available. Blobs never change, so the
+    # digest doubles as a strong ETag.
+    return FileResponse(
+        path,
+        media_type=obj.content_type or "application/octet-stream",
+        filename=obj.file_name,
+        headers={
+            "ETag": f'"{obj.content_sha256}"',
+            "Cache-Control": "private, max-age=31536000, immutable",
+        },
+    )
+
+
+@router.get("/{attachment_id}/thumbnail")
+async def download_thumbnail(
+    attachment_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
+    result = await db.execute(
+        select(AttachmentModel.content_sha256, AttachmentModel.content_type)
+        .where(AttachmentModel.id == attachment_id)
+    )
+    row = result.one_or_none()
+
+    if row is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+
+    if row.content_sha256 is None or not is_image(row.content_type):
+        raise HTTPException(status_code=404, detail="Attachment has no thumbnail")
+
+    path = storage.thumbnail_path(row.content_sha256)
+    if not path.exists():
+        if storage.thumbnail_failed_path(row.content_sha256).exists():
+            raise HTTPException(
+                status_code=404, detail="Thumbnail could not be generated"
+            )
+        # Not rendered yet, or dropped while the queue was full.
+        if not thumbnails.enqueue(row.content_sha256):
+            raise HTTPException(
+                status_code=503,
+                detail="Thumbnail generation unavailable",
+                headers={"Retry-After": "5"},
+            )
+        return JSONResponse(
+            {"status": "pending"},
+            status_code=202,
+            headers={"Retry-After": "1"},
         )
+
+    return FileResponse(
+        path,
+        media_type="image/jpeg",
+        headers={
+            "ETag": f'"{row.content_sha256}-thumb"',
+            "Cache-Control": "private, max-age=31536000, immutable",
+        },
     )
-    return result.scalars().all()
+
+
+@router.get("/task/{task_id}", response_model=Page[Attachment])
+async def list_attachments(
+    task_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt, keys = queries.task_attachments_page(task_id)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.delete("/{attachment_id}")
 async def delete_attachment(
     attachment_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
+    storage: Storage = Depends(get_storage),
 ):
-    await db.execute(
-        delete(AttachmentModel).where(
-            AttachmentModel.id == attachment_id
-        )
+    result = await db.execute(
+        delete(AttachmentModel)
+        .where(AttachmentModel.id == attachment_id)
+        .returning(AttachmentModel.task_id, AttachmentModel.content_sha256)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return {"ok": True}
+
+    await publish(
+        db, task_board(row.task_id), "attachment.deleted",
+        task_id=row.task_id, attachment_id=attachment_id,
     )
-    await db.commit()
+
+    # Background tasks run once the response is sent, which is after the
+    # commit; those of an attempt that is retried are dropped with it.
+    if row.content_sha256 is not None:
+        background_tasks.add_task(
+            delete_if_unreferenced, storage, row.content_sha256
+        )
 
     return {"ok": True}
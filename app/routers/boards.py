@@ -1,11 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request,
+)
+from fastapi.routing import APIRoute
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update, func
+from sqlalchemy import select, delete, update, func, true
 import uuid
+from typing import Literal
 from app.dependencies.db import get_db
-from app.models import Board, User, BoardMember, Column, Task, Subtask, TaskAssignee, Comment
+from app.dependencies.storage import get_storage
+from app import queries
+from app.blobs import delete_if_unreferenced
+from app.clone import clone_board_contents
+from app.events import publish
+from app.export import EXPORTS, export_response
+from app.imports import load_board, parse_import, read_import
+from app.models import Attachment, Board, Column, Task
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.purge import PURGE_THRESHOLD
+from app.reorder import apply_reorder, reorders
 from app.schemas import (
     BoardBase,
+    BoardClone,
     BoardCreate,
     BoardOut,
     BoardViewOut,
@@ -14,11 +29,19 @@ from app.schemas import (
     BoardViewSubtask,
     BoardViewMember,
     BoardViewComment,
+    BoardImportResult,
     BoardReorderPayload,
+    Page,
+    Task as TaskOut,
+    TaskSearchHit,
 )
+from app.search import hit_page, task_hits
+from app.storage import Storage
+from app.transaction import TransactionalRoute, isolation_level
+from app.writes import update_returning
 
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 DEFAULT_COLUMNS = [
     {"title": "Бэклог", "display_order": 1},
@@ -28,39 +51,123 @@ DEFAULT_COLUMNS = [
 ]
 
 
+async def _get_live_board(
+    db: AsyncSession,
+    board_id: uuid.UUID,
+    detail: str,
+    template: bool | None = None,
+) -> Board:
+    stmt = select(Board).where(Board.id == board_id, Board.deleted_at.is_(None))
+    if template is not None:
+        stmt = stmt.where(Board.is_template.is_(template))
+    obj = await db.scalar(stmt)
+    if obj is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return obj
+
+
 @router.post("/", response_model=BoardOut)
 async def create_board(
     data: BoardCreate,
     db: AsyncSession = Depends(get_db),
 ):
-    obj = Board(**data.model_dump())
+    if data.template_id is not None:
+        await _get_live_board(
+            db, data.template_id, "Template not found", template=True
+        )
+
+    obj = Board(**data.model_dump(exclude={"template_id"}))
     db.add(obj)
 
     await db.flush()
 
-    for col in DEFAULT_COLUMNS:
-        db.add(
-            Column(
-                board_id=obj.id,
-                title=col["title"],
-                display_order=col["display_order"],
+    if data.template_id is not None:
+        await clone_board_contents(db, data.template_id, obj.id)
+    else:
+        for col in DEFAULT_COLUMNS:
+            db.add(
+                Column(
+                    board_id=obj.id,
+                    title=col["title"],
+                    display_order=col["display_order"],
+                )
             )
-        )
 
-    await db.commit()
+    await db.flush()
     await db.refresh(obj)
 
     return obj
 
 
-@router.get("/", response_model=list[BoardOut])
+@router.get("/", response_model=Page[BoardOut])
 async def list_boards(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(Board)
+    stmt, keys = queries.boards_page()
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/templates", response_model=Page[BoardOut])
+async def list_templates(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt, keys = queries.boards_page(template=True)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=Page[TaskSearchHit])
+async def search_all_boards(
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: uuid.UUID | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    board_condition = true()
+    if user_id is not None:
+        board_condition = Board.id.in_(queries.user_board_ids(user_id))
+
+    stmt, keys = hit_page(task_hits(q, board_condition), q, cursor, limit)
+    result = await db.execute(stmt)
+    items, next_cursor = page(result.all(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_all_boards(
+    entity: Literal["tasks", "comments"] = "tasks",
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+):
+    return export_response(
+        EXPORTS[entity](), export_format, f"boards-{entity}"
     )
-    return result.scalars().all()
+
+
+# The body is a BoardImport document, a Trello board export (?source=trello)
+# or a CSV file with one task per row (?source=csv).
+@router.post("/import", response_model=BoardImportResult)
+async def import_board(
+    request: Request,
+    source: Literal["native", "trello", "csv"] = "native",
+    title: str | None = Query(None, min_length=1),
+    db: AsyncSession = Depends(get_db),
+):
+    # The body can only be read once and the handler is replayed when its
+    # transaction is retried, so it is kept for the next attempt.
+    body = getattr(request.state, "import_body", None)
+    if body is None:
+        body = request.state.import_body = await read_import(request.stream())
+
+    doc = parse_import(body, source, title)
+    return await load_board(db, doc)
 
 
 @router.get("/{board_id}", response_model=BoardOut)
@@ -69,7 +176,10 @@ async def get_board(
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(
-        select(Board).where(Board.id == board_id)
+        select(Board).where(
+            Board.id == board_id,
+            Board.deleted_at.is_(None),
+        )
     )
     obj = result.scalar_one_or_none()
 
@@ -85,20 +195,16 @@ async def update_board(
     data: BoardBase,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
-        update(Board)
-        .where(Board.id == board_id)
-        .values(**data.model_dump(exclude_unset=True))
+    values = data.model_dump(exclude_unset=True)
+    obj = await update_returning(
+        db,
+        Board,
+        [Board.id == board_id, Board.deleted_at.is_(None)],
+        values,
+        "Board not found",
     )
-    await db.commit()
 
-    result = await db.execute(
-        select(Board).where(Board.id == board_id)
-    )
-    obj = result.scalar_one_or_none()
-
-    if obj is None:
-        raise HTTPException(status_code=404, detail="Board not found")
+    await publish(db, board_id, "board.updated", fields=sorted(values))
 
     return obj
 
@@ -106,37 +212,138 @@ async def update_board(
 @router.delete("/{board_id}")
 async def delete_board(
     board_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
+    storage: Storage = Depends(get_storage),
 ):
-    await db.execute(
-        delete(Board).where(Board.id == board_id)
+    await _get_live_board(db, board_id, "Board not found")
+
+    task_count = await db.scalar(
+        select(func.count()).select_from(Task).where(Task.board_id == board_id)
     )
-    await db.commit()
+
+    if task_count > PURGE_THRESHOLD:
+        # Large boards disappear right away and are purged in chunks by the
+        # background worker (see app.purge).
+        result = await db.execute(
+            update(Board)
+            .where(Board.id == board_id, Board.deleted_at.is_(None))
+            .values(deleted_at=func.now())
+        )
+        if not result.rowcount:
+            raise HTTPException(status_code=404, detail="Board not found")
+        await publish(db, board_id, "board.deleted")
+        return {"ok": True, "purge_scheduled": True}
+
+    blobs = (
+        await db.execute(
+            select(Attachment.content_sha256)
+            .join(Task, Task.id == Attachment.task_id)
+            .where(
+                Task.board_id == board_id,
+                Attachment.content_sha256.is_not(None),
+            )
+            .distinct()
+        )
+    ).scalars().all()
+
+    # A board soft-deleted meanwhile belongs to the purge worker.
+    result = await db.execute(
+        delete(Board).where(Board.id == board_id, Board.deleted_at.is_(None))
+    )
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Board not found")
+    await publish(db, board_id, "board.deleted")
+
+    # The cascade took the attachment rows; their blobs go after the commit.
+    for sha256 in blobs:
+        background_tasks.add_task(delete_if_unreferenced, storage, sha256)
 
     return {"ok": True}
 
 
+@router.get("/{board_id}/search", response_model=Page[TaskSearchHit])
+async def search_board(
+    board_id: uuid.UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    board_exists = await db.scalar(
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
+    )
+    if not board_exists:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    stmt, keys = hit_page(
+        task_hits(q, Board.id == board_id), q, cursor, limit
+    )
+    result = await db.execute(stmt)
+    items, next_cursor = page(result.all(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/{board_id}/tasks/overdue", response_model=Page[TaskOut])
+async def list_overdue_tasks(
+    board_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    board_exists = await db.scalar(
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
+    )
+    if not board_exists:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    stmt, keys = queries.board_overdue_page(board_id)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/{board_id}/export")
+async def export_board(
+    board_id: uuid.UUID,
+    entity: Literal["tasks", "comments"] = "tasks",
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    db: AsyncSession = Depends(get_db),
+):
+    board_exists = await db.scalar(
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
+    )
+    if not board_exists:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    return export_response(
+        EXPORTS[entity](board_id), export_format, f"board-{board_id}-{entity}"
+    )
+
+
 @router.get("/{board_id}/view", response_model=BoardViewOut)
 async def get_board_view(
     board_id: uuid.UUID,
+    compact: bool = False,
     db: AsyncSession = Depends(get_db),
 ):
     board_result = await db.execute(
-        select(Board).where(Board.id == board_id)
+        select(Board).where(
+            Board.id == board_id,
+            Board.deleted_at.is_(None),
+        )
     )
     board = board_result.scalar_one_or_none()
     if board is None:
         raise HTTPException(status_code=404, detail="Board not found")
 
-    members_result = await db.execute(
-        select(
-            BoardMember.user_id,
-            User.name,
-            BoardMember.role,
-        )
-        .join(User, User.id == BoardMember.user_id)
-        .where(BoardMember.board_id == board_id)
-    )
+    members_result = await db.execute(queries.board_view_members(board_id))
     members = [
         BoardViewMember(
             member_id=row.user_id,
@@ -146,29 +353,22 @@ async def get_board_view(
         for row in members_result.all()
     ]
 
-    columns_result = await db.execute(
-        select(Column)
-        .where(Column.board_id == board_id)
-        .order_by(Column.display_order)
-    )
+    columns_result = await db.execute(queries.board_view_columns(board_id))
     columns = columns_result.scalars().all()
 
-    tasks_result = await db.execute(
-        select(Task)
-        .where(Task.board_id == board_id)
-        .order_by(Task.display_order)
-    )
+    tasks_result = await db.execute(queries.board_view_tasks(board_id))
     tasks = tasks_result.scalars().all()
 
     task_ids = [task.id for task in tasks]
 
-    comments_result = await db.execute(
-        select(Comment)
-        .where(Comment.task_id.in_(task_ids))
-        .order_by(Comment.created_at)
-    )
-
-    comments = comments_result.scalars().all()
+    # Cards only need the per-task counters, so the compact view skips
+    # loading comments and subtasks altogether.
+    comments = []
+    if not compact:
+        comments_result = await db.execute(
+            queries.board_view_comments(task_ids)
+        )
+        comments = comments_result.scalars().all()
 
     comments_by_task: dict = {}
     for c in comments:
@@ -183,13 +383,7 @@ async def get_board_view(
         )
 
     assignees_result = await db.execute(
-        select(
-            TaskAssignee.task_id,
-            User.id,
-            User.name,
-        )
-        .join(User, User.id == TaskAssignee.user_id)
-        .where(TaskAssignee.task_id.in_(task_ids))
+        queries.board_view_assignees(task_ids)
     )
 
     assignees_by_task: dict = {}
@@ -201,12 +395,12 @@ async def get_board_view(
             }
         )
 
-    subtasks_result = await db.execute(
-        select(Subtask)
-        .where(Subtask.task_id.in_(task_ids))
-        .order_by(Subtask.display_order)
-    )
-    subtasks = subtasks_result.scalars().all()
+    subtasks = []
+    if not compact:
+        subtasks_result = await db.execute(
+            queries.board_view_subtasks(task_ids)
+        )
+        subtasks = subtasks_result.scalars().all()
 
     subtasks_by_task: dict = {}
     for sub in subtasks:
@@ -231,6 +425,10 @@ async def get_board_view(
                 is_completed=task.is_completed,
                 color=task.color,
                 board_id=task.board_id,
+                subtask_total=task.subtask_total,
+                subtask_done=task.subtask_done,
+                comment_count=task.comment_count,
+                attachment_count=task.attachment_count,
                 assignees=assignees_by_task.get(task.id, []),
                 subtasks=subtasks_by_task.get(task.id, []),
                 comments=comments_by_task.get(task.id, []),
@@ -258,110 +456,63 @@ async def get_board_view(
     )
 
 
-@router.post("/{board_id}/reorder")
-async def reorder_board(
+# Copies the board inside Postgres. With as_template the copy is saved as a
+# template; boards created from it later use POST / with template_id.
+@router.post("/{board_id}/clone", response_model=BoardOut)
+@isolation_level("REPEATABLE READ")
+async def clone_board(
     board_id: uuid.UUID,
-    payload: BoardReorderPayload,
+    data: BoardClone,
     db: AsyncSession = Depends(get_db),
 ):
-    board_result = await db.execute(
-        select(Board).where(Board.id == board_id)
-    )
-    board = board_result.scalar_one_or_none()
-    if board is None:
-        raise HTTPException(status_code=404, detail="Board not found")
+    source = await _get_live_board(db, board_id, "Board not found")
 
-    columns_result = await db.execute(
-        select(Column.id).where(Column.board_id == board_id)
+    obj = Board(
+        title=data.title or source.title,
+        owner_id=data.owner_id or source.owner_id,
+        is_template=data.as_template,
     )
-    board_column_ids = {row.id for row in columns_result.all()}
-
-    for col in payload.columns:
-        if col.column_id not in board_column_ids:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Column {col.column_id} does not belong to board {board_id}",
-            )
-
-    all_task_ids = []
-    for col in payload.columns:
-        all_task_ids.extend(col.task_ids)
-
-    tasks_check = await db.execute(
-        select(Task.id).where(
-            Task.id.in_(all_task_ids),
-            Task.board_id == board_id,
-        )
-    )
-    if len(tasks_check.scalars().all()) != len(all_task_ids):
-        raise HTTPException(
-            status_code=400,
-            detail="Some tasks do not belong to this board",
-        )
-
-    if len(all_task_ids) != len(set(all_task_ids)):
-        raise HTTPException(
-            status_code=400,
-            detail="Duplicate task_ids in reorder payload",
-        )
-
-    tasks_before_result = await db.execute(
-        select(Task.id, Task.column_id)
-        .where(Task.id.in_(all_task_ids))
-    )
-    task_old_column: dict[uuid.UUID, uuid.UUID] = {
-        row.id: row.column_id for row in tasks_before_result.all()
-    }
-
-    columns_titles_result = await db.execute(
-        select(Column.id, Column.title)
-        .where(Column.id.in_(board_column_ids))
-    )
-    column_titles: dict[uuid.UUID, str] = {
-        row.id: row.title for row in columns_titles_result.all()
-    }
-
-    IN_PROGRESS_TITLES = {"В процессе"}
-    DONE_TITLES = {"Готово"}
-
-    affected_column_ids = {col.column_id for col in payload.columns}
+    db.add(obj)
+    await db.flush()
 
-    await db.execute(
-        update(Task)
-        .where(Task.column_id.in_(affected_column_ids))
-        .values(display_order=Task.display_order + 1000)
+    await clone_board_contents(
+        db,
+        board_id,
+        obj.id,
+        include_tasks=data.include_tasks,
+        include_subtasks=data.include_subtasks,
+        include_members=data.include_members,
     )
 
-    for col in payload.columns:
-        for index, task_id in enumerate(col.task_ids):
-            old_column_id = task_old_column.get(task_id)
-            new_column_id = col.column_id
-
-            old_title = column_titles.get(old_column_id)
-            new_title = column_titles.get(new_column_id)
-
-            values: dict = {
-                "column_id": new_column_id,
-                "display_order": index,
-            }
+    await db.refresh(obj)
+    return obj
 
-            if old_title not in IN_PROGRESS_TITLES and new_title in IN_PROGRESS_TITLES:
-                values["started_at"] = func.now()
 
-            if new_title in DONE_TITLES:
-                values["is_completed"] = True
-                values["completed_at"] = func.now()
+@router.post("/{board_id}/reorder")
+@isolation_level("SERIALIZABLE")
+async def reorder_board(
+    board_id: uuid.UUID,
+    payload: BoardReorderPayload,
+    db: AsyncSession = Depends(get_db),
+):
+    return await apply_reorder(db, board_id, payload)
 
-            if old_title in DONE_TITLES and new_title not in DONE_TITLES:
-                values["is_completed"] = False
-                values["completed_at"] = None
 
-            await db.execute(
-                update(Task)
-                .where(Task.id == task_id)
-                .values(**values)
-            )
+# Same as /reorder, but for the burst of calls a client sends while a card is
+# dragged: reorders of the board arriving within REORDER_COALESCE_WINDOW are
+# checked one by one, then merged and written once. The coalescer runs and
+# retries its own transactions, so this route is a plain APIRoute: a retrying
+# TransactionalRoute would submit the payload again into a new batch.
+async def reorder_board_coalesced(
+    board_id: uuid.UUID,
+    payload: BoardReorderPayload,
+):
+    return await reorders.submit(board_id, payload)
 
-    await db.commit()
 
-    return {"ok": True}
+router.add_api_route(
+    "/{board_id}/reorder/coalesced",
+    reorder_board_coalesced,
+    methods=["POST"],
+    route_class_override=APIRoute,
+)
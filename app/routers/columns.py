@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, delete
 import uuid
 from app.dependencies.db import get_db
+from app.events import publish
 from app.models import Column as ColumnModel
-from app.schemas import Column, ColumnCreate, ColumnBase
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.schemas import Column, ColumnCreate, ColumnBase, Page
+from app.transaction import TransactionalRoute
+from app.writes import update_returning
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 
 @router.post("/", response_model=Column)
@@ -17,23 +21,32 @@ async def create_column(
     obj = ColumnModel(**data.model_dump())
     db.add(obj)
 
-    await db.commit()
+    await db.flush()
     await db.refresh(obj)
 
+    await publish(db, obj.board_id, "column.created", column_id=obj.id)
+
     return obj
 
 
-@router.get("/board/{board_id}", response_model=list[Column])
+@router.get("/board/{board_id}", response_model=Page[Column])
 async def list_board_columns(
     board_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
 ):
+    keys = [ColumnModel.display_order, ColumnModel.id]
     result = await db.execute(
-        select(ColumnModel)
-        .where(ColumnModel.board_id == board_id)
-        .order_by(ColumnModel.display_order)
+        paginate(
+            select(ColumnModel).where(ColumnModel.board_id == board_id),
+            keys,
+            cursor,
+            limit,
+        )
     )
-    return result.scalars().all()
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.patch("/{column_id}", response_model=Column)
@@ -42,20 +55,19 @@ async def update_column(
     data: ColumnBase,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
-        update(ColumnModel)
-        .where(ColumnModel.id == column_id)
-        .values(**data.model_dump(exclude_unset=True))
+    values = data.model_dump(exclude_unset=True)
+    obj = await update_returning(
+        db,
+        ColumnModel,
+        [ColumnModel.id == column_id],
+        values,
+        "Column not found",
     )
-    await db.commit()
 
-    result = await db.execute(
-        select(ColumnModel).where(ColumnModel.id == column_id)
+    await publish(
+        db, obj.board_id, "column.updated",
+        column_id=obj.id, fields=sorted(values),
     )
-    obj = result.scalar_one_or_none()
-
-    if obj is None:
-        raise HTTPException(status_code=404, detail="Column not found")
 
     return obj
 
@@ -65,9 +77,14 @@ async def delete_column(
     column_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
-        delete(ColumnModel).where(ColumnModel.id == column_id)
+    result = await db.execute(
+        delete(ColumnModel)
+        .where(ColumnModel.id == column_id)
+        .returning(ColumnModel.board_id)
     )
-    await db.commit()
+    board_id = result.scalar_one_or_none()
+
+    if board_id is not None:
+        await publish(db, board_id, "column.deleted", column_id=column_id)
 
     return {"ok": True}
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import delete
 import uuid
 from app.models import Comment as CommentModel
-from app.schemas import Comment, CommentCreate
+from app.schemas import Comment, CommentCreate, Page
 from app.dependencies.db import get_db
+from app import queries
+from app.events import publish, task_board
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.transaction import TransactionalRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 
 @router.post("/", response_model=Comment)
@@ -17,23 +21,28 @@ async def create_comment(
     obj = CommentModel(**data.model_dump())
     db.add(obj)
 
-    await db.commit()
+    await db.flush()
     await db.refresh(obj)
 
+    await publish(
+        db, task_board(obj.task_id), "comment.created",
+        task_id=obj.task_id, comment_id=obj.id,
+    )
+
     return obj
 
 
-@router.get("/task/{task_id}", response_model=list[Comment])
+@router.get("/task/{task_id}", response_model=Page[Comment])
 async def list_comments(
     task_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(CommentModel).where(
-            CommentModel.task_id == task_id
-        )
-    )
-    return result.scalars().all()
+    stmt, keys = queries.task_comments_page(task_id)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.delete("/{comment_id}")
@@ -41,11 +50,17 @@ async def delete_comment(
     comment_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
-        delete(CommentModel).where(
-            CommentModel.id == comment_id
-        )
+    result = await db.execute(
+        delete(CommentModel)
+        .where(CommentModel.id == comment_id)
+        .returning(CommentModel.task_id)
     )
-    await db.commit()
+    task_id = result.scalar_one_or_none()
+
+    if task_id is not None:
+        await publish(
+            db, task_board(task_id), "comment.deleted",
+            task_id=task_id, comment_id=comment_id,
+        )
 
     return {"ok": True}
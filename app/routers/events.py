@@ -0,0 +1,73 @@
+import asyncio
+import uuid
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from sqlalchemy import func, select
+
+from app.db import AsyncSessionLocal
+from app.events import RESYNC, Subscription, hub
+from app.models import Board
+
+router = APIRouter()
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        message = await subscription.queue.get()
+        await websocket.send_text(message)
+        if subscription.overflowed and message == RESYNC:
+            await websocket.close(code=1013)
+            return
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+# Pushes the board's change events as JSON text frames, e.g.
+# {"board_id": "...", "type": "task.updated", "task_id": "..."}. A
+# {"type": "resync"} frame means events may have been lost and the board
+# should be reloaded.
+@router.websocket("/{board_id}/events")
+async def board_events(websocket: WebSocket, board_id: uuid.UUID):
+    async with AsyncSessionLocal() as db:
+        board_exists = await db.scalar(
+            select(func.count())
+            .select_from(Board)
+            .where(Board.id == board_id, Board.deleted_at.is_(None))
+        )
+
+    if not board_exists:
+        await websocket.close(code=1008)
+        return
+
+    if not hub.running:
+        await websocket.close(code=1013)
+        return
+
+    # Subscribed before the handshake completes, so an event published right
+    # after the client sees the connection open is not missed.
+    subscription = hub.subscribe(board_id)
+    try:
+        await websocket.accept()
+        sender = asyncio.create_task(_send_events(websocket, subscription))
+        receiver = asyncio.create_task(_wait_for_disconnect(websocket))
+        done, pending = await asyncio.wait(
+            {sender, receiver}, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        # Unlike gather, wait leaves a cancellation of this handler (server
+        # shutdown) to the server instead of re-raising the child's.
+        if pending:
+            await asyncio.wait(pending)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                raise exc
+    finally:
+        hub.unsubscribe(subscription)
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
 import uuid
-from app.models import User, BoardMember
+from app.models import Board, User, BoardMember
 from app.dependencies.db import get_db
-from app.schemas import MemberCreate, MemberOut
+from app.events import publish
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.schemas import (
+    MemberBulkCreate,
+    MemberBulkResult,
+    MemberCreate,
+    MemberOut,
+    Page,
+)
+from app.search import user_match
+from app.transaction import TransactionalRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 
 @router.post("/", response_model=MemberOut)
@@ -25,9 +36,11 @@ async def add_member(
     )
     db.add(member)
 
-    await db.commit()
+    await db.flush()
     await db.refresh(member)
 
+    await publish(db, member.board_id, "member.added", user_id=member.user_id)
+
     return MemberOut(
         member_id=member.user_id,
         name=user.name,
@@ -35,29 +48,190 @@ async def add_member(
     )
 
 
-@router.get("/{board_id}", response_model=list[MemberOut])
+@router.post("/bulk", response_model=list[MemberBulkResult])
+async def add_members_bulk(
+    data: MemberBulkCreate,
+    db: AsyncSession = Depends(get_db),
+):
+    board_exists = await db.scalar(
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == data.board_id, Board.deleted_at.is_(None))
+    )
+    if not board_exists:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    emails = [(item.email or "").strip().lower() or None for item in data.members]
+
+    user_by_email: dict[str, uuid.UUID] = {}
+    if any(emails):
+        existing = await db.execute(
+            select(User.id, func.lower(User.email).label("email"))
+            .where(func.lower(User.email).in_(set(emails) - {None}))
+        )
+        user_by_email = {row.email: row.id for row in existing.all()}
+
+    statuses: list[str] = []
+    user_ids: list[uuid.UUID] = []
+    new_users: list[dict] = []
+
+    for item, email in zip(data.members, emails):
+        if email is not None and email in user_by_email:
+            user_id = user_by_email[email]
+            statuses.append("existing")
+        else:
+            user_id = uuid.uuid4()
+            new_users.append({"id": user_id, "name": item.name, "email": email})
+            if email is not None:
+                user_by_email[email] = user_id
+            statuses.append("new")
+
+        user_ids.append(user_id)
+
+    if new_users:
+        # Executed as batched multi-row INSERTs. Rows losing a race against a
+        # concurrent insert of the same email are resolved afterwards.
+        inserted = await db.execute(
+            insert(User)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id),
+            new_users,
+        )
+        inserted_ids = set(inserted.scalars().all())
+
+        conflicted = {
+            user["email"]: user["id"]
+            for user in new_users
+            if user["id"] not in inserted_ids
+        }
+        if conflicted:
+            winners = await db.execute(
+                select(User.id, User.email).where(User.email.in_(conflicted))
+            )
+            remap = {
+                conflicted[row.email]: row.id for row in winners.all()
+            }
+            for index, user_id in enumerate(user_ids):
+                if user_id in remap:
+                    user_ids[index] = remap[user_id]
+                    statuses[index] = "existing"
+
+    rows = []
+    first_index: dict[uuid.UUID, int] = {}
+    for index, (item, user_id) in enumerate(zip(data.members, user_ids)):
+        if user_id in first_index:
+            continue
+        first_index[user_id] = index
+        rows.append(
+            {"board_id": data.board_id, "user_id": user_id, "role": item.role}
+        )
+
+    added = await db.execute(
+        insert(BoardMember)
+        .on_conflict_do_nothing(
+            index_elements=[BoardMember.board_id, BoardMember.user_id]
+        )
+        .returning(BoardMember.user_id),
+        rows,
+    )
+    added_ids = set(added.scalars().all())
+
+    if added_ids:
+        await publish(db, data.board_id, "members.changed")
+
+    results = []
+    for index, user_id in enumerate(user_ids):
+        if first_index[user_id] != index:
+            status = "duplicate"
+        elif user_id not in added_ids:
+            status = "already_member"
+        elif statuses[index] == "new":
+            status = "created"
+        else:
+            status = "added"
+
+        results.append(
+            MemberBulkResult(index=index, member_id=user_id, status=status)
+        )
+
+    return results
+
+
+@router.get("/{board_id}", response_model=Page[MemberOut])
 async def list_members(
     board_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
 ):
+    keys = [BoardMember.user_id]
     result = await db.execute(
-        select(
-            BoardMember.user_id,
-            User.name,
-            BoardMember.role,
+        paginate(
+            select(
+                BoardMember.user_id,
+                User.name,
+                BoardMember.role,
+            )
+            .join(User, User.id == BoardMember.user_id)
+            .where(BoardMember.board_id == board_id),
+            keys,
+            cursor,
+            limit,
         )
-        .join(User, User.id == BoardMember.user_id)
-        .where(BoardMember.board_id == board_id)
     )
+    rows, next_cursor = page(result.all(), keys, limit)
+
+    return {
+        "items": [
+            MemberOut(
+                member_id=row.user_id,
+                name=row.name,
+                role=row.role,
+            )
+            for row in rows
+        ],
+        "next_cursor": next_cursor,
+    }
 
-    return [
-        MemberOut(
-            member_id=row.user_id,
-            name=row.name,
-            role=row.role,
+
+@router.get("/{board_id}/search", response_model=Page[MemberOut])
+async def search_members(
+    board_id: uuid.UUID,
+    q: str = Query(..., min_length=1, max_length=100),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    condition, rank = user_match(q)
+    keys = [rank, BoardMember.user_id]
+    result = await db.execute(
+        paginate(
+            select(
+                BoardMember.user_id,
+                User.name,
+                BoardMember.role,
+                rank,
+            )
+            .join(User, User.id == BoardMember.user_id)
+            .where(BoardMember.board_id == board_id, condition),
+            keys,
+            cursor,
+            limit,
         )
-        for row in result.all()
-    ]
+    )
+    rows, next_cursor = page(result.all(), keys, limit)
+
+    return {
+        "items": [
+            MemberOut(
+                member_id=row.user_id,
+                name=row.name,
+                role=row.role,
+            )
+            for row in rows
+        ],
+        "next_cursor": next_cursor,
+    }
 
 
 @router.delete("/{board_id}/{user_id}")
@@ -66,12 +240,14 @@ async def remove_member(
     user_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
+    result = await db.execute(
         delete(BoardMember).where(
             BoardMember.board_id == board_id,
             BoardMember.user_id == user_id,
         )
     )
-    await db.commit()
+
+    if result.rowcount:
+        await publish(db, board_id, "member.removed", user_id=user_id)
 
     return {"ok": True}
@@ -13,7 +13,10 @@ from sqlalchemy import and_, func, select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies.db import get_db
+from app import queries
 from app.models import Board, Column as BoardColumn, Task, TaskAssignee, User
+from app.transaction import TransactionalRoute
+from app.workflow import DONE_TITLES, IN_PROGRESS_TITLES
 
 
 class PriorityStats(TypedDict):
@@ -38,7 +41,7 @@ class WorkloadStatsItem(TypedDict):
     workload_ratio: float
 
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 
 @router.get("/{board_id}/stats/summary")
@@ -47,63 +50,45 @@ async def board_stats_summary(
     db: AsyncSession = Depends(get_db),
 ):
     board_exists = await db.scalar(
-        select(func.count()).select_from(Board).where(Board.id == board_id)
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
     )
     if not board_exists:
         raise HTTPException(status_code=404, detail="Board not found")
 
+    # Per-column totals are aggregated in the database instead of loading
+    # every task of the board.
     columns_result = await db.execute(
-        select(BoardColumn.id, BoardColumn.title).where(BoardColumn.board_id == board_id)
-    )
-    columns = columns_result.all()
-
-    if not columns:
-        return {
-            "total": 0,
-            "completed": 0,
-            "in_progress": 0,
-            "not_started": 0,
-            "overdue": 0,
-        }
-
-    column_ids = [c.id for c in columns]
-    column_titles = {c.id: c.title for c in columns}
-
-    IN_PROGRESS_TITLES = {"В процессе"}
-    DONE_TITLES = {"Готово"}
-
-    tasks_result = await db.execute(
         select(
-            Task.id,
-            Task.column_id,
-            Task.is_completed,
-            Task.started_at,
-            Task.completed_at,
-            Task.deadline,
-        ).where(Task.column_id.in_(column_ids))
+            BoardColumn.title,
+            func.count(Task.id).label("total"),
+            func.count(Task.completed_at).label("done"),
+        )
+        .outerjoin(Task, Task.column_id == BoardColumn.id)
+        .where(BoardColumn.board_id == board_id)
+        .group_by(BoardColumn.id, BoardColumn.title)
     )
-    tasks = tasks_result.all()
-
-    now = datetime.now(timezone.utc)
 
-    total = len(tasks)
+    total = 0
     completed = 0
     in_progress = 0
     not_started = 0
-    overdue = 0
 
-    for task in tasks:
-        col_title = column_titles.get(task.column_id)
+    for column in columns_result.all():
+        total += column.total
+
+        if column.title in DONE_TITLES:
+            completed += column.total
+            continue
 
-        if task.completed_at is not None or col_title in DONE_TITLES:
-            completed += 1
-        elif col_title in IN_PROGRESS_TITLES:
-            in_progress += 1
+        completed += column.done
+        if column.title in IN_PROGRESS_TITLES:
+            in_progress += column.total - column.done
         else:
-            not_started += 1
+            not_started += column.total - column.done
 
-        if task.deadline and task.completed_at is None and task.deadline < now:
-            overdue += 1
+    overdue = await db.scalar(queries.board_overdue_count(board_id))
 
     return {
         "total": total,
@@ -120,7 +105,9 @@ async def board_stats_priorities(
     db: AsyncSession = Depends(get_db),
 ):
     board_exists = await db.scalar(
-        select(func.count()).select_from(Board).where(Board.id == board_id)
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
     )
     if not board_exists:
         raise HTTPException(status_code=404, detail="Board not found")
@@ -167,7 +154,9 @@ async def board_stats_productivity(
     date_to: datetime | None = None,
 ) -> ProductivityStats:
     board_exists = await db.scalar(
-        select(func.count()).select_from(Board).where(Board.id == board_id)
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
     )
     if not board_exists:
         raise HTTPException(status_code=404, detail="Board not found")
@@ -236,7 +225,9 @@ async def board_stats_productivity_timeline(
     db: AsyncSession = Depends(get_db),
 ) -> list[dict[str, object]]:
     board_exists = await db.scalar(
-        select(func.count()).select_from(Board).where(Board.id == board_id)
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
     )
     if not board_exists:
         raise HTTPException(status_code=404, detail="Board not found")
@@ -318,7 +309,9 @@ async def board_stats_workload(
     date_to: datetime | None = None,
 ) -> list[WorkloadStatsItem]:
     board_exists = await db.scalar(
-        select(func.count()).select_from(Board).where(Board.id == board_id)
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
     )
     if not board_exists:
         raise HTTPException(status_code=404, detail="Board not found")
@@ -401,7 +394,9 @@ async def board_stats_time_by_user(
     db: AsyncSession = Depends(get_db),
 ) -> list[dict[str, object]]:
     board_exists = await db.scalar(
-        select(func.count()).select_from(Board).where(Board.id == board_id)
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
     )
     if not board_exists:
         raise HTTPException(status_code=404, detail="Board not found")
@@ -452,7 +447,9 @@ async def board_stats_completed_tasks_by_user(
     db: AsyncSession = Depends(get_db),
 ) -> list[dict[str, object]]:
     board_exists = await db.scalar(
-        select(func.count()).select_from(Board).where(Board.id == board_id)
+        select(func.count())
+        .select_from(Board)
+        .where(Board.id == board_id, Board.deleted_at.is_(None))
     )
     if not board_exists:
         raise HTTPException(status_code=404, detail="Board not found")
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, delete
 import uuid
 from app.models import Subtask as SubtaskModel
-from app.schemas import Subtask, SubtaskCreate, SubtaskBase
+from app.schemas import Page, Subtask, SubtaskCreate, SubtaskBase
 from app.dependencies.db import get_db
+from app.events import publish, task_board
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.transaction import TransactionalRoute
+from app.writes import update_returning
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 
 @router.post("/", response_model=Subtask)
@@ -17,23 +21,35 @@ async def create_subtask(
     obj = SubtaskModel(**data.model_dump())
     db.add(obj)
 
-    await db.commit()
+    await db.flush()
     await db.refresh(obj)
 
+    await publish(
+        db, task_board(obj.task_id), "subtask.created",
+        task_id=obj.task_id, subtask_id=obj.id,
+    )
+
     return obj
 
 
-@router.get("/task/{task_id}", response_model=list[Subtask])
+@router.get("/task/{task_id}", response_model=Page[Subtask])
 async def list_subtasks(
     task_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
 ):
+    keys = [SubtaskModel.display_order, SubtaskModel.id]
     result = await db.execute(
-        select(SubtaskModel)
-        .where(SubtaskModel.task_id == task_id)
-        .order_by(SubtaskModel.display_order)
+        paginate(
+            select(SubtaskModel).where(SubtaskModel.task_id == task_id),
+            keys,
+            cursor,
+            limit,
+        )
     )
-    return result.scalars().all()
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.patch("/{subtask_id}", response_model=Subtask)
@@ -42,20 +58,19 @@ async def update_subtask(
     data: SubtaskBase,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
-        update(SubtaskModel)
-        .where(SubtaskModel.id == subtask_id)
-        .values(**data.model_dump(exclude_unset=True))
+    values = data.model_dump(exclude_unset=True)
+    obj = await update_returning(
+        db,
+        SubtaskModel,
+        [SubtaskModel.id == subtask_id],
+        values,
+        "Subtask not found",
     )
-    await db.commit()
 
-    result = await db.execute(
-        select(SubtaskModel).where(SubtaskModel.id == subtask_id)
+    await publish(
+        db, task_board(obj.task_id), "subtask.updated",
+        task_id=obj.task_id, subtask_id=obj.id, fields=sorted(values),
     )
-    obj = result.scalar_one_or_none()
-
-    if obj is None:
-        raise HTTPException(status_code=404, detail="Subtask not found")
 
     return obj
 
@@ -65,9 +80,17 @@ async def delete_subtask(
     subtask_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
-        delete(SubtaskModel).where(SubtaskModel.id == subtask_id)
+    result = await db.execute(
+        delete(SubtaskModel)
+        .where(SubtaskModel.id == subtask_id)
+        .returning(SubtaskModel.task_id)
     )
-    await db.commit()
+    task_id = result.scalar_one_or_none()
+
+    if task_id is not None:
+        await publish(
+            db, task_board(task_id), "subtask.deleted",
+            task_id=task_id, subtask_id=subtask_id,
+        )
 
     return {"ok": True}
@@ -1,17 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
+from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel
-from sqlalchemy import select, delete, update
+from sqlalchemy import Integer, Uuid, column, func, insert, select, delete, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from app.models import Priority
 from app.models import Task as TaskModel
 from app.models import TaskAssignee as TaskAssigneeModel
 from app.models import Column as ColumnModel
-from app.schemas import Task, TaskCreate, TaskUpdate
-from app.schemas import TaskAssignee
+from app.models import User as UserModel
+from app.schemas import Page, Task, TaskCreate, TaskUpdate
+from app.schemas import (
+    TaskBatchCreate,
+    TaskBatchDelete,
+    TaskBatchMove,
+    TaskBatchPayload,
+    TaskBatchResult,
+    TaskBatchUpdate,
+)
+from app.schemas import AssigneeSet, AssigneeSetResult, BoardAssigneeSet, TaskAssignee
 from app.dependencies.db import get_db
+from app import queries
+from app.events import publish, task_board
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.transaction import TransactionalRoute, isolation_level
+from app.workflow import column_transition_values
+from app.writes import update_returning
 
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
 
 
 class AssigneeAddIn(BaseModel):
@@ -19,6 +39,7 @@ class AssigneeAddIn(BaseModel):
 
 
 @router.post("/", response_model=Task)
+@isolation_level("SERIALIZABLE")
 async def create_task(
     data: TaskCreate,
     db: AsyncSession = Depends(get_db),
@@ -52,23 +73,246 @@ async def create_task(
     )
 
     db.add(obj)
-    await db.commit()
+    await db.flush()
     await db.refresh(obj)
 
+    await publish(
+        db, obj.board_id, "task.created",
+        task_id=obj.id, column_id=obj.column_id,
+    )
+
     return obj
 
 
-@router.get("/column/{column_id}", response_model=list[Task])
+@router.post("/batch", response_model=list[TaskBatchResult])
+@isolation_level("SERIALIZABLE")
+async def batch_tasks(
+    payload: TaskBatchPayload,
+    db: AsyncSession = Depends(get_db),
+):
+    operations = payload.operations
+    creates = [op for op in operations if isinstance(op, TaskBatchCreate)]
+    updates = [op for op in operations if isinstance(op, TaskBatchUpdate)]
+    moves = [op for op in operations if isinstance(op, TaskBatchMove)]
+    deletes = [op for op in operations if isinstance(op, TaskBatchDelete)]
+
+    task_ids = [op.task_id for op in updates + moves + deletes]
+    if len(task_ids) != len(set(task_ids)):
+        raise HTTPException(
+            status_code=400,
+            detail="A task can only be referenced once per batch",
+        )
+
+    tasks: dict = {}
+    if task_ids:
+        tasks_result = await db.execute(
+            select(TaskModel.id, TaskModel.board_id, TaskModel.column_id)
+            .where(TaskModel.id.in_(task_ids))
+        )
+        tasks = {row.id: row for row in tasks_result.all()}
+
+        missing = [str(task_id) for task_id in task_ids if task_id not in tasks]
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Tasks not found: {', '.join(missing)}",
+            )
+
+    column_ids = {op.column_id for op in creates + moves}
+    column_ids |= {tasks[op.task_id].column_id for op in moves}
+
+    columns: dict = {}
+    if column_ids:
+        columns_result = await db.execute(
+            select(ColumnModel.id, ColumnModel.board_id, ColumnModel.title)
+            .where(ColumnModel.id.in_(column_ids))
+        )
+        columns = {row.id: row for row in columns_result.all()}
+
+        if len(columns) != len(column_ids):
+            raise HTTPException(status_code=400, detail="Column not found")
+
+    for op in moves:
+        if columns[op.column_id].board_id != tasks[op.task_id].board_id:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Task {op.task_id} cannot be moved to another board",
+            )
+
+    if deletes:
+        await db.execute(
+            delete(TaskModel)
+            .where(TaskModel.id.in_([op.task_id for op in deletes]))
+        )
+
+    update_groups: dict[tuple, list[dict]] = {}
+    for op in updates:
+        data = op.model_dump(exclude_unset=True, exclude={"op", "task_id"})
+        if data.get("color") is not None:
+            data["color"] = data["color"].upper()
+
+        if data.get("display_order") is not None and data["display_order"] < 0:
+            raise HTTPException(
+                status_code=400,
+                detail="display_order must be >= 0"
+            )
+
+        if data:
+            update_groups.setdefault(tuple(sorted(data)), []).append(
+                {"id": op.task_id, **data}
+            )
+
+    # Bulk UPDATE by primary key, one executemany per distinct field set.
+    for rows in update_groups.values():
+        await db.execute(update(TaskModel), rows)
+
+    # New tasks and moves without an explicit position go to the top of their
+    # column, in the same order as if they had been sent one by one: the
+    # existing tasks of each column are shifted down once for the whole batch.
+    top_items: dict[uuid.UUID, list] = {}
+    for op in operations:
+        if isinstance(op, TaskBatchCreate) or (
+            isinstance(op, TaskBatchMove) and op.display_order is None
+        ):
+            top_items.setdefault(op.column_id, []).append(op)
+
+    if top_items:
+        shifts = values(
+            column("column_id", Uuid),
+            column("shift", Integer),
+            name="shifts",
+        ).data([(column_id, len(ops)) for column_id, ops in top_items.items()])
+
+        await db.execute(
+            update(TaskModel)
+            .where(TaskModel.column_id == shifts.c.column_id)
+            .values(display_order=TaskModel.display_order + shifts.c.shift)
+            .execution_options(synchronize_session=False)
+        )
+
+    top_positions: dict[int, int] = {}
+    for ops in top_items.values():
+        for position, op in enumerate(reversed(ops)):
+            top_positions[id(op)] = position
+
+    if moves:
+        moved = values(
+            column("id", Uuid),
+            column("column_id", Uuid),
+            column("display_order", Integer),
+            name="moved",
+        ).data([
+            (
+                op.task_id,
+                op.column_id,
+                op.display_order
+                if op.display_order is not None
+                else top_positions[id(op)],
+            )
+            for op in moves
+        ])
+
+        await db.execute(
+            update(TaskModel)
+            .where(TaskModel.id == moved.c.id)
+            .values(
+                column_id=moved.c.column_id,
+                display_order=moved.c.display_order,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        transitions: dict[tuple, list[uuid.UUID]] = {}
+        for op in moves:
+            old_title = columns[tasks[op.task_id].column_id].title
+            new_title = columns[op.column_id].title
+            transitions.setdefault((old_title, new_title), []).append(op.task_id)
+
+        for (old_title, new_title), ids in transitions.items():
+            transition = column_transition_values(old_title, new_title)
+            if transition:
+                await db.execute(
+                    update(TaskModel)
+                    .where(TaskModel.id.in_(ids))
+                    .values(**transition)
+                    .execution_options(synchronize_session=False)
+                )
+
+    created_ids: dict[int, uuid.UUID] = {}
+    if creates:
+        rows = []
+        for op in creates:
+            created_ids[id(op)] = uuid.uuid4()
+            rows.append(
+                {
+                    "id": created_ids[id(op)],
+                    "title": op.title,
+                    "column_id": op.column_id,
+                    "board_id": columns[op.column_id].board_id,
+                    "display_order": top_positions[id(op)],
+                }
+            )
+        await db.execute(insert(TaskModel), rows)
+
+    board_ids = {row.board_id for row in tasks.values()}
+    board_ids |= {row.board_id for row in columns.values()}
+    for board_id in board_ids:
+        await publish(db, board_id, "tasks.changed")
+
+    return [
+        TaskBatchResult(
+            index=index,
+            op=op.op,
+            task_id=created_ids[id(op)]
+            if isinstance(op, TaskBatchCreate)
+            else op.task_id,
+        )
+        for index, op in enumerate(operations)
+    ]
+
+
+@router.get("/", response_model=Page[Task])
+async def query_tasks(
+    board_id: uuid.UUID | None = None,
+    column_id: uuid.UUID | None = None,
+    assignee_id: uuid.UUID | None = None,
+    created_by: uuid.UUID | None = None,
+    priority: list[Priority] | None = Query(None),
+    is_completed: bool | None = None,
+    deadline_from: datetime | None = None,
+    deadline_to: datetime | None = None,
+    sort: Literal["created_at", "deadline"] = "created_at",
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt, keys = queries.tasks_page(
+        board_id=board_id,
+        column_id=column_id,
+        assignee_id=assignee_id,
+        created_by=created_by,
+        priority=priority,
+        is_completed=is_completed,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+        sort=sort,
+    )
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/column/{column_id}", response_model=Page[Task])
 async def list_tasks(
     column_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(TaskModel)
-        .where(TaskModel.column_id == column_id)
-        .order_by(TaskModel.display_order)
-    )
-    return result.scalars().all()
+    stmt, keys = queries.column_tasks_page(column_id)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get("/{task_id}", response_model=Task)
@@ -93,14 +337,6 @@ async def update_task(
     data: TaskUpdate,
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(TaskModel).where(TaskModel.id == task_id)
-    )
-    obj = result.scalar_one_or_none()
-
-    if obj is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-
     payload = data.model_dump(exclude_unset=True)
     if "color" in payload and payload["color"] is not None:
         payload["color"] = payload["color"].upper()
@@ -111,14 +347,19 @@ async def update_task(
             detail="display_order must be >= 0"
         )
 
-    await db.execute(
-        update(TaskModel)
-        .where(TaskModel.id == task_id)
-        .values(**payload)
+    obj = await update_returning(
+        db,
+        TaskModel,
+        [TaskModel.id == task_id],
+        payload,
+        "Task not found",
+    )
+
+    await publish(
+        db, obj.board_id, "task.updated",
+        task_id=obj.id, fields=sorted(payload),
     )
-    await db.commit()
 
-    await db.refresh(obj)
     return obj
 
 
@@ -127,10 +368,15 @@ async def delete_task(
     task_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
-        delete(TaskModel).where(TaskModel.id == task_id)
+    result = await db.execute(
+        delete(TaskModel)
+        .where(TaskModel.id == task_id)
+        .returning(TaskModel.board_id)
     )
-    await db.commit()
+    board_id = result.scalar_one_or_none()
+
+    if board_id is not None:
+        await publish(db, board_id, "task.deleted", task_id=task_id)
 
     return {"ok": True}
 
@@ -145,23 +391,127 @@ async def add_assignee_to_task(
     db.add(obj)
 
     try:
-        await db.commit()
-    except Exception:
-        await db.rollback()
+        await db.flush()
+    except IntegrityError:
         raise HTTPException(status_code=400, detail="Cannot assign user to task")
 
     await db.refresh(obj)
+    await publish(db, task_board(task_id), "task.assignees", task_id=task_id)
     return obj
 
 
+# Replaces the assignees of every task in `desired` with the given users: one
+# DELETE for assignments that are no longer wanted and one INSERT .. ON
+# CONFLICT DO NOTHING for the missing ones. Rows that already match are not
+# touched, so repeated calls with the same set take no row locks.
+async def _set_assignees(
+    db: AsyncSession,
+    desired: dict[uuid.UUID, set[uuid.UUID]],
+) -> dict:
+    user_ids = set().union(*desired.values())
+    if user_ids:
+        existing = await db.execute(
+            select(UserModel.id).where(UserModel.id.in_(user_ids))
+        )
+        missing = user_ids - set(existing.scalars().all())
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Users not found: {', '.join(sorted(map(str, missing)))}",
+            )
+
+    # Sorted so that concurrent requests lock rows in the same order.
+    pairs = sorted(
+        (task_id, user_id)
+        for task_id, users in desired.items()
+        for user_id in users
+    )
+
+    stale = delete(TaskAssigneeModel).where(
+        TaskAssigneeModel.task_id.in_(desired)
+    )
+    if pairs:
+        stale = stale.where(
+            tuple_(TaskAssigneeModel.task_id, TaskAssigneeModel.user_id)
+            .not_in(pairs)
+        )
+    removed = await db.execute(
+        stale.returning(TaskAssigneeModel.task_id, TaskAssigneeModel.user_id)
+    )
+
+    added = []
+    if pairs:
+        inserted = await db.execute(
+            pg_insert(TaskAssigneeModel)
+            .on_conflict_do_nothing()
+            .returning(TaskAssigneeModel.task_id, TaskAssigneeModel.user_id),
+            [{"task_id": task_id, "user_id": user_id} for task_id, user_id in pairs],
+        )
+        added = inserted.all()
+
+    return {"added": added, "removed": removed.all()}
+
+
+@router.put("/{task_id}/assignees", response_model=AssigneeSetResult)
+async def set_task_assignees(
+    task_id: uuid.UUID,
+    data: AssigneeSet,
+    db: AsyncSession = Depends(get_db),
+):
+    task_exists = await db.scalar(
+        select(func.count()).select_from(TaskModel).where(TaskModel.id == task_id)
+    )
+    if not task_exists:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    result = await _set_assignees(db, {task_id: set(data.user_ids)})
+    if result["added"] or result["removed"]:
+        await publish(db, task_board(task_id), "task.assignees", task_id=task_id)
+
+    return result
+
+
+@router.put("/board/{board_id}/assignees", response_model=AssigneeSetResult)
+async def set_board_assignees(
+    board_id: uuid.UUID,
+    data: BoardAssigneeSet,
+    db: AsyncSession = Depends(get_db),
+):
+    desired: dict[uuid.UUID, set[uuid.UUID]] = {}
+    for item in data.tasks:
+        if item.task_id in desired:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Task {item.task_id} is listed more than once",
+            )
+        desired[item.task_id] = set(item.user_ids)
+
+    found = await db.execute(
+        select(TaskModel.id).where(
+            TaskModel.id.in_(desired),
+            TaskModel.board_id == board_id,
+        )
+    )
+    missing = set(desired) - set(found.scalars().all())
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tasks not found on board: {', '.join(sorted(map(str, missing)))}",
+        )
+
+    result = await _set_assignees(db, desired)
+    if result["added"] or result["removed"]:
+        await publish(db, board_id, "tasks.changed")
+
+    return result
+
+
 @router.get("/{task_id}/assignees", response_model=list[TaskAssignee])
 async def list_task_assignees(
     task_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(TaskAssigneeModel).where(TaskAssigneeModel.task_id == task_id)
-    )
+    result = await db.execute(queries.task_assignees(task_id))
     return result.scalars().all()
 
 
@@ -171,12 +521,14 @@ async def remove_assignee_from_task(
     user_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
 ):
-    await db.execute(
+    result = await db.execute(
         delete(TaskAssigneeModel).where(
             TaskAssigneeModel.task_id == task_id,
             TaskAssigneeModel.user_id == user_id,
         )
     )
-    await db.commit()
+
+    if result.rowcount:
+        await publish(db, task_board(task_id), "task.assignees", task_id=task_id)
 
     return {"ok": True}
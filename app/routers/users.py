@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 import uuid
+from datetime import timedelta
 from app.models import User as UserModel
-from app.schemas import User, UserCreate
+from app.schemas import BoardSummary, Page, User, UserCreate
+from app.schemas import Task as TaskOut
 from app.dependencies.db import get_db
+from app import queries
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, page
+from app.transaction import TransactionalRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TransactionalRoute)
+
+# Longest look-ahead for due tasks; wider windows degrade into a scan of every
+# open task the user is assigned to.
+MAX_DUE_WITHIN = timedelta(days=90)
 
 
 @router.post("/", response_model=User)
@@ -17,20 +26,35 @@ async def create_user(
     obj = UserModel(**data.model_dump())
     db.add(obj)
 
-    await db.commit()
+    await db.flush()
     await db.refresh(obj)
 
     return obj
 
 
-@router.get("/", response_model=list[User])
+@router.get("/", response_model=Page[User])
 async def list_users(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(UserModel)
-    )
-    return result.scalars().all()
+    stmt, keys = queries.users_page()
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=Page[User])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt, keys = queries.user_search_page(q)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.all(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get("/{user_id}", response_model=User)
@@ -49,6 +73,37 @@ async def get_user(
     return obj
 
 
+@router.get("/{user_id}/boards", response_model=Page[BoardSummary])
+async def list_user_boards(
+    user_id: uuid.UUID,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt, keys = queries.user_boards_page(user_id)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.all(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/{user_id}/tasks/due", response_model=Page[TaskOut])
+async def list_due_tasks(
+    user_id: uuid.UUID,
+    within: timedelta = Query(
+        timedelta(days=7),
+        gt=timedelta(0),
+        le=MAX_DUE_WITHIN,
+    ),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    stmt, keys = queries.user_due_tasks_page(user_id, within)
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    items, next_cursor = page(result.scalars(), keys, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: uuid.UUID,
@@ -57,6 +112,5 @@ async def delete_user(
     await db.execute(
         delete(UserModel).where(UserModel.id == user_id)
     )
-    await db.commit()
 
     return {"ok": True}
@@ -1,10 +1,17 @@
 import uuid
 from datetime import datetime
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Annotated, Generic, Literal, Optional, List, TypeVar, Union
 from app.models import Priority
 import re
 
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 
 class UserBase(BaseModel):
     name: str
@@ -28,7 +35,18 @@ class BoardBase(BaseModel):
 
 
 class BoardCreate(BoardBase):
-    pass
+    # Seeds the board from a template instead of the default columns.
+    template_id: Optional[uuid.UUID] = None
+
+
+class BoardClone(BaseModel):
+    # Defaults to the title of the source board.
+    title: Optional[str] = None
+    owner_id: Optional[uuid.UUID] = None
+    include_tasks: bool = True
+    include_subtasks: bool = True
+    include_members: bool = False
+    as_template: bool = False
 
 
 class Board(BoardBase):
@@ -44,6 +62,7 @@ class Board(BoardBase):
 class BoardOut(BoardBase):
     id: uuid.UUID
     owner_id: uuid.UUID | None
+    is_template: bool = False
     created_at: datetime
     updated_at: datetime
 
@@ -51,6 +70,13 @@ class BoardOut(BoardBase):
         orm_mode = True
 
 
+class BoardSummary(BoardOut):
+    role: Optional[str] = None
+    task_count: int
+    open_task_count: int
+    overdue_count: int
+
+
 class ColumnBase(BaseModel):
     title: str
     display_order: int
@@ -82,13 +108,12 @@ class TaskCreate(BaseModel):
     column_id: uuid.UUID
 
 
-class TaskUpdate(BaseModel):
+# The fields of a task that can change without moving it; see TaskUpdate.
+class TaskFieldsUpdate(BaseModel):
     title: Optional[str] = Field(default=None, min_length=1)
     priority: Optional[Priority] = None
     deadline: Optional[datetime] = None
     display_order: Optional[int] = None
-    column_id: Optional[uuid.UUID] = None
-    is_completed: Optional[bool] = None
     color: Optional[str] = Field(
         default=None,
     )
@@ -110,6 +135,11 @@ class TaskUpdate(BaseModel):
         return value
 
 
+class TaskUpdate(TaskFieldsUpdate):
+    column_id: Optional[uuid.UUID] = None
+    is_completed: Optional[bool] = None
+
+
 class Task(TaskBase):
     id: uuid.UUID
     created_at: datetime
@@ -117,11 +147,60 @@ class Task(TaskBase):
     column_id: uuid.UUID
     is_completed: Optional[bool]
     created_by: uuid.UUID | None
+    subtask_total: int = 0
+    subtask_done: int = 0
+    comment_count: int = 0
+    attachment_count: int = 0
 
     class Config:
         orm_mode = True
 
 
+class TaskBatchCreate(BaseModel):
+    op: Literal["create"]
+    title: str = Field(min_length=1)
+    column_id: uuid.UUID
+
+
+# Column changes go through "move" operations, which check the board and
+# apply the workflow transitions; completion follows from the column.
+class TaskBatchUpdate(TaskFieldsUpdate):
+    op: Literal["update"]
+    task_id: uuid.UUID
+
+    class Config:
+        extra = "forbid"
+
+
+class TaskBatchMove(BaseModel):
+    op: Literal["move"]
+    task_id: uuid.UUID
+    column_id: uuid.UUID
+    # Omitted: the task goes to the top of the column, like a new task.
+    display_order: Optional[int] = Field(default=None, ge=0)
+
+
+class TaskBatchDelete(BaseModel):
+    op: Literal["delete"]
+    task_id: uuid.UUID
+
+
+TaskBatchOperation = Annotated[
+    Union[TaskBatchCreate, TaskBatchUpdate, TaskBatchMove, TaskBatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class TaskBatchPayload(BaseModel):
+    operations: List[TaskBatchOperation] = Field(min_length=1, max_length=1000)
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    task_id: uuid.UUID
+
+
 class SubtaskBase(BaseModel):
     title: str
     is_completed: bool
@@ -174,6 +253,9 @@ class Attachment(AttachmentBase):
     task_id: uuid.UUID
     uploaded_at: datetime
     uploaded_by: uuid.UUID
+    content_sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
+    content_type: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -187,6 +269,25 @@ class TaskAssignee(BaseModel):
         orm_mode = True
 
 
+# Sizes keep the pairs of a board-wide set within one statement's bind
+# parameter limit.
+class AssigneeSet(BaseModel):
+    user_ids: List[uuid.UUID] = Field(max_length=100)
+
+
+class TaskAssigneeSet(AssigneeSet):
+    task_id: uuid.UUID
+
+
+class BoardAssigneeSet(BaseModel):
+    tasks: List[TaskAssigneeSet] = Field(min_length=1, max_length=100)
+
+
+class AssigneeSetResult(BaseModel):
+    added: List[TaskAssignee]
+    removed: List[TaskAssignee]
+
+
 class BoardMember(BaseModel):
     board_id: uuid.UUID
     user_id: uuid.UUID
@@ -208,6 +309,27 @@ class MemberOut(BaseModel):
     role: str
 
 
+class MemberBulkItem(BaseModel):
+    name: str
+    email: Optional[str] = None
+    role: str
+
+
+class MemberBulkCreate(BaseModel):
+    board_id: uuid.UUID
+    members: List[MemberBulkItem] = Field(min_length=1, max_length=5000)
+
+
+class MemberBulkResult(BaseModel):
+    index: int
+    member_id: uuid.UUID
+    # created: new user added to the board
+    # added: existing user (matched by email) added to the board
+    # already_member: existing user that was already on the board
+    # duplicate: same email as an earlier row of the request
+    status: str
+
+
 class BoardViewSubtask(BaseModel):
     id: uuid.UUID
     title: str
@@ -243,8 +365,13 @@ class BoardViewTask(BaseModel):
     is_completed: bool
     color: Optional[str] = None
     board_id: uuid.UUID
+    subtask_total: int = 0
+    subtask_done: int = 0
+    comment_count: int = 0
+    attachment_count: int = 0
     assignees: List[BoardViewAssignee] = []
-    subtasks: List[BoardViewSubtask]
+    # Left empty in the compact view, which only carries the counters.
+    subtasks: List[BoardViewSubtask] = []
     comments: list[BoardViewComment] = []
 
 
@@ -264,6 +391,18 @@ class BoardViewOut(BaseModel):
     columns: List[BoardViewColumn]
 
 
+class TaskSearchHit(BaseModel):
+    # task: the title matched, comment: the comment `id` matched
+    kind: Literal["task", "comment"]
+    id: uuid.UUID
+    task_id: uuid.UUID
+    board_id: uuid.UUID
+    column_id: uuid.UUID
+    title: str
+    # HTML-escaped matched text with the terms wrapped in <mark></mark>
+    headline: str
+
+
 class ColumnReorderPayload(BaseModel):
     column_id: uuid.UUID
     task_ids: List[uuid.UUID]
@@ -271,3 +410,86 @@ class ColumnReorderPayload(BaseModel):
 
 class BoardReorderPayload(BaseModel):
     columns: List[ColumnReorderPayload]
+
+
+class BoardImportMember(BaseModel):
+    # Referenced by task assignees and comment authors of the same document.
+    ref: str
+    name: str
+    # Matched against existing users; a new user is created otherwise.
+    # Members without one are left out of the import.
+    email: Optional[str] = None
+    role: str = "member"
+
+
+class BoardImportSubtask(BaseModel):
+    title: str
+    is_completed: bool = False
+    color: Optional[str] = None
+
+
+class BoardImportComment(BaseModel):
+    content: str
+    author: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class BoardImportTask(BaseModel):
+    title: str
+    priority: Optional[Priority] = None
+    deadline: Optional[datetime] = None
+    is_completed: bool = False
+    color: Optional[str] = None
+    assignees: List[str] = []
+    subtasks: List[BoardImportSubtask] = []
+    comments: List[BoardImportComment] = []
+
+
+class BoardImportColumn(BaseModel):
+    title: str
+    color: Optional[str] = None
+    tasks: List[BoardImportTask] = []
+
+
+class BoardImport(BaseModel):
+    title: str
+    owner_id: Optional[uuid.UUID] = None
+    members: List[BoardImportMember] = []
+    columns: List[BoardImportColumn] = Field(min_length=1)
+
+
+class BoardImportStage(BaseModel):
+    name: str
+    rows: int
+    seconds: float
+
+
+class BoardImportResult(BaseModel):
+    board_id: uuid.UUID
+    rows: dict[str, int]
+    stages: List[BoardImportStage]
+    seconds: float
+    rows_per_second: float
+
+
+class SlowQuery(BaseModel):
+    id: int
+    at: datetime
+    duration_ms: float
+    route: Optional[str]
+    statement: str
+    # Types and lengths only, never the values.
+    parameters: List[str]
+    # skipped, pending, done or failed
+    explain_status: str
+    explain: Optional[str]
+
+
+class ProfileSummary(BaseModel):
+    id: int
+    at: datetime
+    method: str
+    path: str
+    route: str
+    duration_ms: float
+    samples: int
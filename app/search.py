@@ -0,0 +1,155 @@
+from sqlalchemy import Float, case, cast, func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from app.models import Board, Comment, Task, User
+from app.pagination import paginate
+
+# Must match the configuration of the generated columns in migration 0007.
+TEXT_SEARCH_CONFIG = "simple"
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2"
+
+# Replaced in this order, so the ampersands of the entities are not escaped
+# again.
+HTML_ESCAPES = (
+    ("&", "&amp;"),
+    ("<", "&lt;"),
+    (">", "&gt;"),
+    ('"', "&quot;"),
+    ("'", "&#x27;"),
+)
+
+
+def escape_like(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
+# Prefix or fuzzy (trigram word similarity) match on user name and email.
+# Every predicate is served by the indexes from migration 0005. Returns the
+# filter and a rank expression that sorts the best matches first.
+def user_match(q: str):
+    term = q.strip().lower()
+    # Rendered inline: the btree prefix indexes only apply to LIKE patterns
+    # the planner can see, which a generic prepared plan would hide.
+    prefix = literal(escape_like(term) + "%", literal_execute=True)
+
+    name = func.lower(User.name)
+    email = func.lower(User.email)
+
+    is_prefix = or_(name.like(prefix), email.like(prefix))
+    condition = or_(
+        is_prefix,
+        name.op("%>", is_comparison=True)(term),
+        email.op("%>", is_comparison=True)(term),
+    )
+
+    score = func.greatest(
+        func.word_similarity(term, name),
+        func.word_similarity(term, email),
+    ) + case((is_prefix, 1), else_=0)
+
+    # Negated so that ascending keyset pagination returns best matches first.
+    rank = cast(-score, Float).label("rank")
+
+    return condition, rank
+
+
+# Headlines are rendered as HTML by clients, so the text they are cut from is
+# escaped before ts_headline adds its <mark> tags. The parser reads the
+# entities as single tokens, so matching is unaffected.
+def html_escape(expr):
+    for char, entity in HTML_ESCAPES:
+        expr = func.replace(expr, char, entity)
+    return expr
+
+
+def text_query(q: str):
+    return func.websearch_to_tsquery(
+        cast(TEXT_SEARCH_CONFIG, REGCONFIG), q.strip()
+    )
+
+
+# Tasks whose title or one of whose comments matches `q`, on live boards
+# matching `board_condition`. Both branches are driven by the GIN indexes from
+# migration 0007; the rank is negated like in user_match so that ascending
+# keyset pagination returns the best matches first.
+def task_hits(q: str, board_condition):
+    query = text_query(q)
+
+    title_hits = (
+        select(
+            literal("task").label("kind"),
+            Task.id.label("id"),
+            Task.id.label("task_id"),
+            cast(-func.ts_rank(Task.search_vector, query), Float).label("rank"),
+        )
+        .join(Board, Board.id == Task.board_id)
+        .where(
+            Task.search_vector.op("@@")(query),
+            Board.deleted_at.is_(None),
+            board_condition,
+        )
+    )
+
+    comment_hits = (
+        select(
+            literal("comment").label("kind"),
+            Comment.id.label("id"),
+            Comment.task_id.label("task_id"),
+            cast(-func.ts_rank(Comment.search_vector, query), Float).label("rank"),
+        )
+        .join(Task, Task.id == Comment.task_id)
+        .join(Board, Board.id == Task.board_id)
+        .where(
+            Comment.search_vector.op("@@")(query),
+            Board.deleted_at.is_(None),
+            board_condition,
+        )
+    )
+
+    return union_all(title_hits, comment_hits).subquery("hits")
+
+
+# Headlines are the most expensive part of a search, so they are only built
+# for the rows of the requested page.
+def hit_page(hits, q: str, cursor: str | None, limit: int):
+    keys = [hits.c.rank, hits.c.id]
+    ranked = paginate(select(hits), keys, cursor, limit).subquery("ranked")
+
+    # The comment is looked up for comment hits only; CASE never evaluates
+    # the subquery for task hits.
+    matched_text = case(
+        (
+            ranked.c.kind == "comment",
+            select(Comment.content)
+            .where(Comment.id == ranked.c.id)
+            .scalar_subquery(),
+        ),
+        else_=Task.title,
+    )
+    headline = func.ts_headline(
+        cast(TEXT_SEARCH_CONFIG, REGCONFIG),
+        html_escape(func.coalesce(matched_text, Task.title)),
+        text_query(q),
+        HEADLINE_OPTIONS,
+    )
+
+    stmt = (
+        select(
+            ranked.c.kind,
+            ranked.c.id,
+            ranked.c.task_id,
+            ranked.c.rank,
+            Task.board_id,
+            Task.column_id,
+            Task.title,
+            headline.label("headline"),
+        )
+        .join(Task, Task.id == ranked.c.task_id)
+        .order_by(ranked.c.rank, ranked.c.id)
+    )
+    return stmt, keys
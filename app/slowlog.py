@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.db import connect_raw, engine
+from app.sqlstats import current_stats, route_of
+
+logger = logging.getLogger(__name__)
+
+# Off unless a threshold is configured.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+# Share of slow SELECTs that are re-run under EXPLAIN (ANALYZE, BUFFERS).
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+SLOW_QUERY_EXPLAIN_CONCURRENCY = int(
+    os.getenv("SLOW_QUERY_EXPLAIN_CONCURRENCY", "1")
+)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(
+    os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "30000")
+)
+
+WRITE_PATTERN = re.compile(
+    r"\b(INSERT|UPDATE|DELETE)\b|\bFOR\s+(UPDATE|SHARE|NO\s+KEY)\b",
+    re.IGNORECASE,
+)
+
+
+def redact(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def _explainable(statement: str, executemany: bool) -> bool:
+    if executemany:
+        return False
+    words = statement.lstrip().split(None, 1)
+    if not words or words[0].upper() not in {"SELECT", "WITH"}:
+        return False
+    # Row locks would be taken again; a WITH may hide an INSERT or UPDATE.
+    return WRITE_PATTERN.search(statement) is None
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        size: int = SLOW_QUERY_LOG_SIZE,
+        explain_rate: float = SLOW_QUERY_EXPLAIN_RATE,
+        explain_concurrency: int = SLOW_QUERY_EXPLAIN_CONCURRENCY,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.entries: deque[dict] = deque(maxlen=size)
+        self.explain_rate = explain_rate
+        self.explain_concurrency = explain_concurrency
+        self.explaining: set[asyncio.Task] = set()
+        self.ids = itertools.count(1)
+
+    def record(self, statement, parameters, seconds, executemany) -> None:
+        stats = current_stats.get()
+        params = parameters if not executemany else ()
+        entry = {
+            "id": next(self.ids),
+            "at": datetime.now(timezone.utc),
+            "duration_ms": round(seconds * 1000, 1),
+            "route": route_of(stats.scope) if stats is not None else None,
+            "statement": statement,
+            "parameters": [redact(value) for value in params or ()],
+            "explain_status": "skipped",
+            "explain": None,
+        }
+        self.entries.append(entry)
+        logger.warning(
+            "slow query (%.1f ms) on %s: %s params=%s",
+            entry["duration_ms"], entry["route"],
+            " ".join(statement.split())[:500], entry["parameters"],
+        )
+
+        if (
+            _explainable(statement, executemany)
+            and len(self.explaining) < self.explain_concurrency
+            and random.random() < self.explain_rate
+        ):
+            entry["explain_status"] = "pending"
+            # A fresh context: the request may be long gone by the time the
+            # plan is ready.
+            task = asyncio.get_running_loop().create_task(
+                self._explain(entry, statement, tuple(params or ())),
+                context=contextvars.Context(),
+            )
+            self.explaining.add(task)
+            task.add_done_callback(self.explaining.discard)
+
+    # Runs the statement once more on a separate connection, inside a
+    # read-only transaction that is always rolled back, so side effects of
+    # functions it calls (pg_notify, advisory locks) never take hold.
+    async def _explain(self, entry: dict, statement: str, params: tuple) -> None:
+        try:
+            conn = await connect_raw()
+            try:
+                transaction = conn.transaction(readonly=True)
+                await transaction.start()
+                try:
+                    await conn.execute(
+                        "SET LOCAL statement_timeout = "
+                        f"{SLOW_QUERY_EXPLAIN_TIMEOUT_MS}"
+                    )
+                    rows = await conn.fetch(
+                        f"EXPLAIN (ANALYZE, BUFFERS) {statement}", *params
+                    )
+                finally:
+                    await transaction.rollback()
+            finally:
+                await conn.close()
+        except Exception as exc:
+            entry["explain_status"] = "failed"
+            entry["explain"] = f"{type(exc).__name__}: {exc}"
+            return
+
+        entry["explain"] = "\n".join(row[0] for row in rows)
+        entry["explain_status"] = "done"
+        logger.info("plan of slow query %d:\n%s", entry["id"], entry["explain"])
+
+    def recent(self, limit: int) -> list[dict]:
+        return list(itertools.islice(reversed(self.entries), limit))
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+slow_queries = SlowQueryLog()
+
+
+if slow_queries.threshold > 0:
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        # The start time is set by the hook in app.sqlstats.
+        seconds = time.perf_counter() - context.query_start
+        if seconds >= slow_queries.threshold:
+            slow_queries.record(statement, parameters, seconds, executemany)
@@ -0,0 +1,144 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.db import engine
+from app.metrics import UNMATCHED_ROUTE, Histogram, method_label, registry
+
+logger = logging.getLogger(__name__)
+
+SQL_STATS_ENABLED = os.getenv("SQL_STATS", "1") == "1"
+# A request issuing more statements than this is logged as a warning.
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "50"))
+# As is a request running the same statement this many times, the usual sign
+# of a query inside a loop.
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+
+DB_QUERIES_PER_REQUEST = registry.register(Histogram(
+    "http_request_db_queries",
+    "SQL statements issued per request.",
+    ("method", "route"),
+    (1, 2, 5, 10, 20, 50, 100, 200, 500),
+))
+
+
+def route_of(scope: dict) -> str:
+    return getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+class RequestSqlStats:
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+        # statement text -> [executions, seconds]. Statements carry bind
+        # placeholders, so the text is the shape of the query.
+        self.statements: dict[str, list] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def server_timing(self) -> bytes:
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.queries} queries"'
+        ).encode()
+
+
+# Statements run in SQLAlchemy's greenlets, which share the context of the
+# awaiting task, so the hooks below see the stats of the current request.
+current_stats: ContextVar[RequestSqlStats | None] = ContextVar(
+    "current_sql_stats", default=None
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    context.query_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context.query_start)
+
+
+def _report(stats: RequestSqlStats, status: int, elapsed: float) -> None:
+    method = stats.scope["method"]
+    route = route_of(stats.scope)
+    DB_QUERIES_PER_REQUEST.observe(stats.queries, method_label(method), route)
+
+    summary = {
+        "method": method,
+        "route": route,
+        "status": status,
+        "queries": stats.queries,
+        "db_ms": round(stats.seconds * 1000, 1),
+        "total_ms": round(elapsed * 1000, 1),
+    }
+    logger.info(
+        " ".join(f"{key}={value}" for key, value in summary.items()),
+        extra={"sql": summary},
+    )
+
+    if stats.queries > SQL_QUERY_BUDGET:
+        logger.warning(
+            "%s %s issued %d queries, over the budget of %d",
+            method, route, stats.queries, SQL_QUERY_BUDGET,
+        )
+    for statement, (count, seconds) in stats.statements.items():
+        if count >= SQL_REPEAT_THRESHOLD:
+            logger.warning(
+                "%s %s ran the same statement %d times (%.1f ms): %s",
+                method, route, count, seconds * 1000,
+                " ".join(statement.split())[:300],
+            )
+
+
+# Counts and times the statements of each request. The totals go into a
+# Server-Timing header (visible in the browser's network panel) and one log
+# line per request. Statements issued after the response has started, e.g.
+# by a streamed export, count towards the log line only.
+class SqlStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSqlStats(scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"server-timing", stats.server_timing()),
+                ]
+            await send(message)
+
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_stats.reset(token)
+            _report(stats, status, time.perf_counter() - start)
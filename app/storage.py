@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Protocol
+
+from app.db import connect_raw
+
+STORAGE_DIR = Path(os.getenv("ATTACHMENT_STORAGE_DIR", "data/attachments"))
+STORAGE_CHUNK_SIZE = int(os.getenv("ATTACHMENT_CHUNK_SIZE", str(1024 * 1024)))
+STORAGE_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Blobs younger than this are never swept, so an upload that has been moved
+# into place but not yet committed is not mistaken for garbage. The same grace
+# applies to temporary files, which are written to while an upload runs.
+SWEEP_MIN_AGE_SECONDS = float(os.getenv("ATTACHMENT_SWEEP_MIN_AGE", "3600"))
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+@dataclass
+class StoredFile:
+    sha256: str
+    size: int
+    temp_path: Path
+
+
+class Storage(Protocol):
+    async def receive(self, chunks: AsyncIterator[bytes]) -> StoredFile: ...
+
+    async def persist(self, stored: StoredFile) -> None: ...
+
+    async def discard(self, stored: StoredFile) -> None: ...
+
+    async def delete(self, sha256: str) -> None: ...
+
+    def path(self, sha256: str) -> Path: ...
+
+    def thumbnail_path(self, sha256: str) -> Path: ...
+
+    def thumbnail_failed_path(self, sha256: str) -> Path: ...
+
+
+# Content-addressed files on local disk: <root>/ab/cd/<sha256>. An upload is
+# received into a temporary file first and only moved into place by persist(),
+# which callers run while holding the blob's advisory lock (see
+# app.routers.attachments), so a concurrent delete of the last reference
+# cannot remove a file that a new attachment is about to point to.
+class LocalStorage:
+    def __init__(
+        self,
+        root: Path,
+        chunk_size: int = STORAGE_CHUNK_SIZE,
+        max_bytes: int = STORAGE_MAX_BYTES,
+    ):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+
+    def path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    # Derived files live beside the blob and go away with it.
+    def thumbnail_path(self, sha256: str) -> Path:
+        return self.path(sha256).with_name(f"{sha256}.thumb.jpg")
+
+    # Marks a blob whose thumbnail could not be rendered, so it is not tried
+    # again on every request.
+    def thumbnail_failed_path(self, sha256: str) -> Path:
+        return self.path(sha256).with_name(f"{sha256}.thumb.failed")
+
+    @property
+    def tmp_dir(self) -> Path:
+        return self.root / "tmp"
+
+    async def receive(self, chunks: AsyncIterator[bytes]) -> StoredFile:
+        tmp_dir = self.tmp_dir
+        await asyncio.to_thread(tmp_dir.mkdir, parents=True, exist_ok=True)
+        temp_path = tmp_dir / uuid.uuid4().hex
+
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        f = await asyncio.to_thread(open, temp_path, "wb")
+        try:
+            # Incoming chunks are regrouped into fixed-size writes, so memory
+            # use is bounded by chunk_size whatever the client sends.
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise FileTooLarge(self.max_bytes)
+                digest.update(chunk)
+                buffer += chunk
+                while len(buffer) >= self.chunk_size:
+                    await asyncio.to_thread(f.write, buffer[:self.chunk_size])
+                    del buffer[:self.chunk_size]
+            if buffer:
+                await asyncio.to_thread(f.write, bytes(buffer))
+            await asyncio.to_thread(f.close)
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+            raise
+
+        return StoredFile(sha256=digest.hexdigest(), size=size, temp_path=temp_path)
+
+    async def persist(self, stored: StoredFile) -> None:
+        await asyncio.to_thread(self._persist, stored)
+
+    def _persist(self, stored: StoredFile) -> None:
+        target = self.path(stored.sha256)
+        if target.exists():
+            # Identical content is stored once. Touching the blob keeps a
+            # concurrent sweep from treating it as old garbage.
+            os.utime(target)
+            stored.temp_path.unlink(missing_ok=True)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(stored.temp_path, target)
+
+    async def discard(self, stored: StoredFile) -> None:
+        await asyncio.to_thread(stored.temp_path.unlink, missing_ok=True)
+
+    async def delete(self, sha256: str) -> None:
+        await asyncio.to_thread(self._delete, sha256)
+
+    def _delete(self, sha256: str) -> None:
+        self.path(sha256).unlink(missing_ok=True)
+        self.thumbnail_path(sha256).unlink(missing_ok=True)
+        self.thumbnail_failed_path(sha256).unlink(missing_ok=True)
+
+    def iter_blobs(self):
+        for path in self.root.glob("??/??/*"):
+            if path.is_file() and not path.suffix:
+                yield path
+
+    def iter_temp_files(self):
+        for path in self.tmp_dir.glob("*"):
+            if path.is_file():
+                yield path
+
+
+storage = LocalStorage(STORAGE_DIR)
+
+
+async def _sweep_batch(conn, local: LocalStorage, paths: dict[str, Path]) -> int:
+    rows = await conn.fetch(
+        "SELECT DISTINCT content_sha256 FROM attachments "
+        "WHERE content_sha256 = ANY($1::varchar[])",
+        list(paths),
+    )
+    referenced = {row["content_sha256"] for row in rows}
+
+    removed = 0
+    for sha256, path in paths.items():
+        if sha256 not in referenced:
+            local._delete(sha256)
+            removed += 1
+    return removed
+
+
+# Removes blobs no attachment points to any more, e.g. after a task or board
+# was deleted with its attachments by a cascading DELETE, and temporary files
+# left behind by uploads whose worker was killed.
+async def sweep(local: LocalStorage = storage, batch_size: int = 1000) -> int:
+    cutoff = time.time() - SWEEP_MIN_AGE_SECONDS
+    removed = 0
+
+    conn = await connect_raw()
+    try:
+        batch: dict[str, Path] = {}
+        for path in local.iter_blobs():
+            if path.stat().st_mtime >= cutoff:
+                continue
+            batch[path.name] = path
+            if len(batch) >= batch_size:
+                removed += await _sweep_batch(conn, local, batch)
+                batch = {}
+        if batch:
+            removed += await _sweep_batch(conn, local, batch)
+    finally:
+        await conn.close()
+
+    for path in local.iter_temp_files():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # Moved into place or discarded meanwhile.
+            pass
+
+    return removed
+
+
+if __name__ == "__main__":
+    print(f"removed {asyncio.run(sweep())} unreferenced files")
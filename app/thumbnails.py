@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.metrics import THUMBNAIL_QUEUE, registry
+from app.storage import Storage, storage
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = int(os.getenv("ATTACHMENT_THUMBNAIL_SIZE", "256"))
+THUMBNAIL_WORKERS = int(os.getenv("ATTACHMENT_THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_QUEUE_SIZE = int(os.getenv("ATTACHMENT_THUMBNAIL_QUEUE_SIZE", "1000"))
+THUMBNAIL_WORKER_ENABLED = os.getenv("ATTACHMENT_THUMBNAIL_WORKER", "1") == "1"
+# Larger images are refused before they are decoded, so an image bomb cannot
+# exhaust a worker's memory.
+THUMBNAIL_MAX_PIXELS = int(
+    os.getenv("ATTACHMENT_THUMBNAIL_MAX_PIXELS", str(50_000_000))
+)
+
+IMAGE_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+
+
+def is_image(content_type: str | None) -> bool:
+    if content_type is None:
+        return False
+    return content_type.split(";")[0].strip().lower() in IMAGE_CONTENT_TYPES
+
+
+# Runs in a worker process. Pillow is only imported there, the API processes
+# never load it.
+def render_thumbnail(source: str, target: str, size: int) -> None:
+    from PIL import Image
+
+    # Pillow only warns between the limit and twice the limit.
+    Image.MAX_IMAGE_PIXELS = THUMBNAIL_MAX_PIXELS
+    warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+    temp = f"{target}.tmp"
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        image.convert("RGB").save(temp, "JPEG", quality=85)
+    os.replace(temp, target)
+
+
+# Thumbnails are rendered in a process pool so decoding and resizing images
+# never takes the event loop (or the GIL) away from request handling. Uploads
+# only enqueue the blob's digest; a bounded queue sheds load instead of
+# growing without limit, and the thumbnail endpoint re-enqueues on demand.
+# Images that fail to render are marked and not enqueued again.
+class ThumbnailQueue:
+    def __init__(
+        self,
+        backend: Storage,
+        workers: int = THUMBNAIL_WORKERS,
+        maxsize: int = THUMBNAIL_QUEUE_SIZE,
+        size: int = THUMBNAIL_SIZE,
+    ):
+        self.storage = backend
+        self.workers = workers
+        self.size = size
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.pending: set[str] = set()
+        self.executor: ProcessPoolExecutor | None = None
+        self.tasks: list[asyncio.Task] = []
+        self.in_progress = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self.executor is not None
+
+    def enqueue(self, sha256: str) -> bool:
+        if not self.running:
+            return False
+        if sha256 in self.pending:
+            return True
+        try:
+            self.queue.put_nowait(sha256)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.pending.add(sha256)
+        return True
+
+    def metrics(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "in_progress": self.in_progress,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+    def _mark_failed(self, sha256: str, exc: Exception) -> None:
+        try:
+            self.storage.thumbnail_failed_path(sha256).write_text(
+                f"{type(exc).__name__}: {exc}\n"
+            )
+        except OSError:
+            # The blob was deleted meanwhile.
+            pass
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            sha256 = await self.queue.get()
+            self.in_progress += 1
+            executor = self.executor
+            try:
+                await loop.run_in_executor(
+                    executor,
+                    render_thumbnail,
+                    str(self.storage.path(sha256)),
+                    str(self.storage.thumbnail_path(sha256)),
+                    self.size,
+                )
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except (BrokenProcessPool, ImportError):
+                # A crashed worker or a missing Pillow says nothing about the
+                # image, which can be tried again later.
+                self.failed += 1
+                logger.exception("Thumbnail worker unavailable for %s", sha256)
+                if self.executor is executor:
+                    self._restart_executor()
+            except Exception as exc:
+                self.failed += 1
+                logger.exception("Thumbnail generation failed for %s", sha256)
+                await asyncio.to_thread(self._mark_failed, sha256, exc)
+            finally:
+                self.in_progress -= 1
+                self.pending.discard(sha256)
+                self.queue.task_done()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that already runs an event loop and
+        # threads is not safe.
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    # A worker that dies (e.g. killed for running out of memory) breaks the
+    # whole pool and every later job would fail with it. The first job to
+    # notice replaces the pool; jobs that were running in it fail once.
+    def _restart_executor(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._new_executor()
+
+    def start(self) -> None:
+        self.executor = self._new_executor()
+        self.tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+thumbnails = ThumbnailQueue(storage)
+
+
+def _collect_thumbnail_stats() -> None:
+    for state, value in thumbnails.metrics().items():
+        if state != "running":
+            THUMBNAIL_QUEUE.set(value, state)
+
+
+registry.add_collector(_collect_thumbnail_stats)
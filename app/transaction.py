@@ -0,0 +1,90 @@
+import asyncio
+import os
+import random
+from typing import Awaitable, Callable, TypeVar
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal
+
+T = TypeVar("T")
+
+# serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+TX_MAX_ATTEMPTS = int(os.getenv("TX_MAX_ATTEMPTS", "5"))
+TX_RETRY_BASE_DELAY = float(os.getenv("TX_RETRY_BASE_DELAY", "0.02"))
+TX_RETRY_MAX_DELAY = float(os.getenv("TX_RETRY_MAX_DELAY", "0.5"))
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if not isinstance(exc, DBAPIError):
+        return False
+    return getattr(exc.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+def retry_delay(attempt: int) -> float:
+    # Full jitter keeps retrying transactions from colliding again in lockstep.
+    cap = min(TX_RETRY_MAX_DELAY, TX_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(0, cap)
+
+
+async def run_in_transaction(
+    work: Callable[[AsyncSession], Awaitable[T]],
+    isolation_level: str | None = None,
+) -> T:
+    attempt = 0
+    while True:
+        attempt += 1
+        async with AsyncSessionLocal() as session:
+            try:
+                if isolation_level is not None:
+                    await session.connection(
+                        execution_options={"isolation_level": isolation_level}
+                    )
+                result = await work(session)
+                await session.commit()
+                return result
+            except Exception as exc:
+                await session.rollback()
+                if attempt >= TX_MAX_ATTEMPTS or not is_retryable(exc):
+                    raise
+
+        await asyncio.sleep(retry_delay(attempt))
+
+
+def isolation_level(level: str):
+    # Must be applied below the router decorator, e.g.
+    #
+    #   @router.post("/")
+    #   @isolation_level("SERIALIZABLE")
+    #   async def create_something(...): ...
+    def decorator(endpoint):
+        endpoint.__isolation_level__ = level
+        return endpoint
+
+    return decorator
+
+
+# Runs every request in one transaction that is committed once. The whole
+# handler, dependencies included, is replayed when the transaction fails with
+# a serialization failure or a deadlock.
+class TransactionalRoute(APIRoute):
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+        level = getattr(self.endpoint, "__isolation_level__", None)
+
+        async def transactional_handler(request: Request) -> Response:
+            async def work(session: AsyncSession) -> Response:
+                request.state.db = session
+                return await handler(request)
+
+            try:
+                return await run_in_transaction(work, isolation_level=level)
+            finally:
+                request.state.db = None
+
+        return transactional_handler
@@ -0,0 +1,22 @@
+from sqlalchemy import func
+
+# Columns are matched by title to drive task status changes.
+IN_PROGRESS_TITLES = {"В процессе"}
+DONE_TITLES = {"Готово"}
+
+
+def column_transition_values(old_title: str | None, new_title: str | None) -> dict:
+    values: dict = {}
+
+    if old_title not in IN_PROGRESS_TITLES and new_title in IN_PROGRESS_TITLES:
+        values["started_at"] = func.now()
+
+    if new_title in DONE_TITLES:
+        values["is_completed"] = True
+        values["completed_at"] = func.now()
+
+    if old_title in DONE_TITLES and new_title not in DONE_TITLES:
+        values["is_completed"] = False
+        values["completed_at"] = None
+
+    return values
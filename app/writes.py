@@ -0,0 +1,25 @@
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Applies a PATCH as one UPDATE .. RETURNING and hands back the updated row as
+# an ORM object, ready for the response model. No row back means no match.
+async def update_returning(
+    db: AsyncSession,
+    model,
+    conditions,
+    values: dict,
+    not_found: str,
+):
+    if values:
+        stmt = update(model).where(*conditions).values(**values).returning(model)
+    else:
+        stmt = select(model).where(*conditions)
+
+    obj = (await db.execute(stmt)).scalar_one_or_none()
+
+    if obj is None:
+        raise HTTPException(status_code=404, detail=not_found)
+
+    return obj
@@ -0,0 +1,117 @@
+-- Schema as it existed before migrations were introduced. Every statement is
+-- idempotent so the file can be applied to databases that were created from
+-- the models directly.
+
+DO $$
+BEGIN
+    CREATE TYPE priority_level AS ENUM ('low', 'medium', 'high');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS users (
+    id UUID NOT NULL,
+    name VARCHAR NOT NULL,
+    email VARCHAR,
+    avatar_url VARCHAR,
+    PRIMARY KEY (id),
+    UNIQUE (email)
+);
+
+CREATE TABLE IF NOT EXISTS boards (
+    id UUID NOT NULL,
+    title VARCHAR NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    owner_id UUID,
+    PRIMARY KEY (id),
+    FOREIGN KEY (owner_id) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS board_members (
+    board_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    role VARCHAR NOT NULL,
+    PRIMARY KEY (board_id, user_id),
+    FOREIGN KEY (board_id) REFERENCES boards (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS columns (
+    id UUID NOT NULL,
+    board_id UUID NOT NULL,
+    title VARCHAR NOT NULL,
+    display_order INTEGER NOT NULL,
+    color VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (board_id) REFERENCES boards (id)
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id UUID NOT NULL,
+    board_id UUID NOT NULL,
+    column_id UUID NOT NULL,
+    title VARCHAR NOT NULL,
+    priority priority_level,
+    deadline TIMESTAMP WITH TIME ZONE,
+    display_order INTEGER NOT NULL,
+    is_completed BOOLEAN NOT NULL,
+    color VARCHAR NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    created_by UUID,
+    PRIMARY KEY (id),
+    FOREIGN KEY (board_id) REFERENCES boards (id),
+    FOREIGN KEY (column_id) REFERENCES columns (id),
+    FOREIGN KEY (created_by) REFERENCES users (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_tasks_board_id ON tasks (board_id);
+
+CREATE TABLE IF NOT EXISTS attachments (
+    id UUID NOT NULL,
+    task_id UUID NOT NULL,
+    file_url VARCHAR NOT NULL,
+    file_name VARCHAR NOT NULL,
+    uploaded_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    uploaded_by UUID NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (task_id) REFERENCES tasks (id),
+    FOREIGN KEY (uploaded_by) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id UUID NOT NULL,
+    task_id UUID NOT NULL,
+    user_id UUID,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (task_id) REFERENCES tasks (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+CREATE TABLE IF NOT EXISTS subtasks (
+    id UUID NOT NULL,
+    task_id UUID NOT NULL,
+    title VARCHAR NOT NULL,
+    is_completed BOOLEAN NOT NULL,
+    display_order INTEGER NOT NULL,
+    color VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (task_id) REFERENCES tasks (id)
+);
+
+CREATE TABLE IF NOT EXISTS task_assignees (
+    task_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    PRIMARY KEY (task_id, user_id),
+    FOREIGN KEY (task_id) REFERENCES tasks (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
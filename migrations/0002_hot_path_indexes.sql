@@ -0,0 +1,30 @@
+-- migrate:no-transaction
+-- Indexes for the board view, stats and per-task listings. Built concurrently
+-- so existing tables stay writable while the migration runs.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_columns_board_id_display_order
+    ON columns (board_id, display_order);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_column_id_display_order
+    ON tasks (column_id, display_order);
+
+-- Active tasks only: overdue counts and open-task stats never touch the
+-- (ever growing) set of completed tasks.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_board_id_open
+    ON tasks (board_id, deadline)
+    WHERE completed_at IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_subtasks_task_id_display_order
+    ON subtasks (task_id, display_order);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_comments_task_id_created_at
+    ON comments (task_id, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attachments_task_id
+    ON attachments (task_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_task_assignees_user_id
+    ON task_assignees (user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_board_members_user_id
+    ON board_members (user_id);
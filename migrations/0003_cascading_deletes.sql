@@ -0,0 +1,59 @@
+-- migrate:no-transaction
+-- Child rows follow their board, column or task on delete. Foreign keys are
+-- swapped in as NOT VALID (no table scan under the exclusive lock) and
+-- validated afterwards with a weaker lock. Every statement is idempotent.
+
+ALTER TABLE boards ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_boards_deleted_at
+    ON boards (deleted_at)
+    WHERE deleted_at IS NOT NULL;
+
+ALTER TABLE columns
+    DROP CONSTRAINT IF EXISTS columns_board_id_fkey,
+    ADD CONSTRAINT columns_board_id_fkey FOREIGN KEY (board_id)
+        REFERENCES boards (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE board_members
+    DROP CONSTRAINT IF EXISTS board_members_board_id_fkey,
+    ADD CONSTRAINT board_members_board_id_fkey FOREIGN KEY (board_id)
+        REFERENCES boards (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE tasks
+    DROP CONSTRAINT IF EXISTS tasks_board_id_fkey,
+    ADD CONSTRAINT tasks_board_id_fkey FOREIGN KEY (board_id)
+        REFERENCES boards (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE tasks
+    DROP CONSTRAINT IF EXISTS tasks_column_id_fkey,
+    ADD CONSTRAINT tasks_column_id_fkey FOREIGN KEY (column_id)
+        REFERENCES columns (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE subtasks
+    DROP CONSTRAINT IF EXISTS subtasks_task_id_fkey,
+    ADD CONSTRAINT subtasks_task_id_fkey FOREIGN KEY (task_id)
+        REFERENCES tasks (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE comments
+    DROP CONSTRAINT IF EXISTS comments_task_id_fkey,
+    ADD CONSTRAINT comments_task_id_fkey FOREIGN KEY (task_id)
+        REFERENCES tasks (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE attachments
+    DROP CONSTRAINT IF EXISTS attachments_task_id_fkey,
+    ADD CONSTRAINT attachments_task_id_fkey FOREIGN KEY (task_id)
+        REFERENCES tasks (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE task_assignees
+    DROP CONSTRAINT IF EXISTS task_assignees_task_id_fkey,
+    ADD CONSTRAINT task_assignees_task_id_fkey FOREIGN KEY (task_id)
+        REFERENCES tasks (id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE columns VALIDATE CONSTRAINT columns_board_id_fkey;
+ALTER TABLE board_members VALIDATE CONSTRAINT board_members_board_id_fkey;
+ALTER TABLE tasks VALIDATE CONSTRAINT tasks_board_id_fkey;
+ALTER TABLE tasks VALIDATE CONSTRAINT tasks_column_id_fkey;
+ALTER TABLE subtasks VALIDATE CONSTRAINT subtasks_task_id_fkey;
+ALTER TABLE comments VALIDATE CONSTRAINT comments_task_id_fkey;
+ALTER TABLE attachments VALIDATE CONSTRAINT attachments_task_id_fkey;
+ALTER TABLE task_assignees VALIDATE CONSTRAINT task_assignees_task_id_fkey;
@@ -0,0 +1,33 @@
+-- migrate:no-transaction
+-- Every list endpoint pages by a (sort key, id) keyset; these indexes match
+-- the filter plus sort order exactly and replace the narrower ones from 0002.
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id
+    ON users (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_boards_created_at_id_live
+    ON boards (created_at, id)
+    WHERE deleted_at IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_columns_board_id_display_order_id
+    ON columns (board_id, display_order, id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_columns_board_id_display_order;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_column_id_display_order_id
+    ON tasks (column_id, display_order, id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_column_id_display_order;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_subtasks_task_id_display_order_id
+    ON subtasks (task_id, display_order, id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_subtasks_task_id_display_order;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_comments_task_id_created_at_id
+    ON comments (task_id, created_at, id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_comments_task_id_created_at;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attachments_task_id_uploaded_at_id
+    ON attachments (task_id, uploaded_at, id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_attachments_task_id;
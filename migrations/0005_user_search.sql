@@ -0,0 +1,18 @@
+-- migrate:no-transaction
+-- Trigram indexes serve fuzzy (%>) and infix matches on name and email, the
+-- pattern_ops btrees keep one- and two-letter prefix lookups cheap, where
+-- trigrams cannot narrow anything down.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_name_trgm
+    ON users USING gin (lower(name) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_trgm
+    ON users USING gin (lower(email) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_name_prefix
+    ON users (lower(name) text_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_prefix
+    ON users (lower(email) text_pattern_ops);
@@ -0,0 +1,86 @@
+-- Per-board task counters kept current by statement-level triggers on tasks.
+-- Transition tables make bulk statements (imports, clones, purges) cost one
+-- aggregated UPDATE per statement instead of one per row.
+
+ALTER TABLE boards
+    ADD COLUMN IF NOT EXISTS task_count INTEGER DEFAULT 0 NOT NULL,
+    ADD COLUMN IF NOT EXISTS open_task_count INTEGER DEFAULT 0 NOT NULL;
+
+CREATE OR REPLACE FUNCTION boards_apply_task_counts() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE boards b
+        SET task_count = b.task_count + d.total,
+            open_task_count = b.open_task_count + d.open
+        FROM (
+            SELECT board_id,
+                   count(*) AS total,
+                   count(*) FILTER (WHERE completed_at IS NULL) AS open
+            FROM new_rows
+            GROUP BY board_id
+        ) d
+        WHERE b.id = d.board_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE boards b
+        SET task_count = b.task_count - d.total,
+            open_task_count = b.open_task_count - d.open
+        FROM (
+            SELECT board_id,
+                   count(*) AS total,
+                   count(*) FILTER (WHERE completed_at IS NULL) AS open
+            FROM old_rows
+            GROUP BY board_id
+        ) d
+        WHERE b.id = d.board_id;
+    ELSE
+        UPDATE boards b
+        SET task_count = b.task_count + d.total,
+            open_task_count = b.open_task_count + d.open
+        FROM (
+            SELECT board_id, sum(total) AS total, sum(open) AS open
+            FROM (
+                SELECT board_id, 1 AS total,
+                       (completed_at IS NULL)::int AS open
+                FROM new_rows
+                UNION ALL
+                SELECT board_id, -1 AS total,
+                       -(completed_at IS NULL)::int AS open
+                FROM old_rows
+            ) changes
+            GROUP BY board_id
+        ) d
+        WHERE b.id = d.board_id
+          AND (d.total <> 0 OR d.open <> 0);
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS tasks_count_insert ON tasks;
+CREATE TRIGGER tasks_count_insert
+    AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION boards_apply_task_counts();
+
+DROP TRIGGER IF EXISTS tasks_count_update ON tasks;
+CREATE TRIGGER tasks_count_update
+    AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION boards_apply_task_counts();
+
+DROP TRIGGER IF EXISTS tasks_count_delete ON tasks;
+CREATE TRIGGER tasks_count_delete
+    AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION boards_apply_task_counts();
+
+UPDATE boards b
+SET task_count = (
+        SELECT count(*) FROM tasks t WHERE t.board_id = b.id
+    ),
+    open_task_count = (
+        SELECT count(*) FROM tasks t
+        WHERE t.board_id = b.id AND t.completed_at IS NULL
+    );
@@ -0,0 +1,29 @@
+-- migrate:no-transaction
+-- Full-text search over task titles and comment contents. The vectors are
+-- stored generated columns, so Postgres keeps them current on every write.
+-- Title lexemes carry weight A and comment lexemes weight B, which makes a
+-- title match outrank a comment match in ts_rank. The 'simple' configuration
+-- does not stem, so it behaves the same for every language on a board.
+--
+-- Unlike the other migrations this one is not online: adding a stored
+-- generated column rewrites tasks and comments under an ACCESS EXCLUSIVE
+-- lock, which blocks reads and writes of both tables for the duration. Run
+-- it in a maintenance window on large databases.
+
+ALTER TABLE tasks
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+    ) STORED;
+
+ALTER TABLE comments
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_search_vector
+    ON tasks USING gin (search_vector);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_comments_search_vector
+    ON comments USING gin (search_vector);
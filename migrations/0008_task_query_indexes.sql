@@ -0,0 +1,24 @@
+-- migrate:no-transaction
+-- Indexes behind GET /tasks. Each one matches a filter plus the keyset sort
+-- order, so a page is an index range scan whatever the other filters are.
+-- (board_id, created_at, id) replaces the plain board_id index and
+-- (user_id, task_id) the plain user_id index on assignments.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_created_at_id
+    ON tasks (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_board_id_created_at_id
+    ON tasks (board_id, created_at, id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_board_id;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_created_by_created_at_id
+    ON tasks (created_by, created_at, id)
+    WHERE created_by IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_deadline_id
+    ON tasks (deadline, id)
+    WHERE deadline IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_task_assignees_user_id_task_id
+    ON task_assignees (user_id, task_id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_task_assignees_user_id;
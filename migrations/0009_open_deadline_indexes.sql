@@ -0,0 +1,14 @@
+-- migrate:no-transaction
+-- Open tasks by deadline, for the overdue and due-soon feeds and the overdue
+-- counts. Completed tasks are left out of both indexes, so their size tracks
+-- the open work rather than a board's whole history. The board index gains
+-- id as a trailing column to serve the (deadline, id) keyset exactly.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_deadline_id_open
+    ON tasks (deadline, id)
+    WHERE completed_at IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_board_id_deadline_id_open
+    ON tasks (board_id, deadline, id)
+    WHERE completed_at IS NULL;
+DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_board_id_open;
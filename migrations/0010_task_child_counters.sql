@@ -0,0 +1,155 @@
+-- Per-task subtask, comment and attachment counters, kept current by
+-- statement-level triggers in the same way as the board counters of 0006.
+-- A statement touching many children of one task updates that task once.
+-- Existing tasks start at zero and are recounted in batches by app.reconcile
+-- once this migration is in (see BACKFILLS in app.migrate), instead of by one
+-- UPDATE rewriting every task inside this transaction.
+
+ALTER TABLE tasks
+    ADD COLUMN IF NOT EXISTS subtask_total INTEGER DEFAULT 0 NOT NULL,
+    ADD COLUMN IF NOT EXISTS subtask_done INTEGER DEFAULT 0 NOT NULL,
+    ADD COLUMN IF NOT EXISTS comment_count INTEGER DEFAULT 0 NOT NULL,
+    ADD COLUMN IF NOT EXISTS attachment_count INTEGER DEFAULT 0 NOT NULL;
+
+CREATE OR REPLACE FUNCTION tasks_apply_subtask_counts() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE tasks t
+        SET subtask_total = t.subtask_total + d.total,
+            subtask_done = t.subtask_done + d.done
+        FROM (
+            SELECT task_id,
+                   count(*) AS total,
+                   count(*) FILTER (WHERE is_completed) AS done
+            FROM new_rows
+            GROUP BY task_id
+        ) d
+        WHERE t.id = d.task_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE tasks t
+        SET subtask_total = t.subtask_total - d.total,
+            subtask_done = t.subtask_done - d.done
+        FROM (
+            SELECT task_id,
+                   count(*) AS total,
+                   count(*) FILTER (WHERE is_completed) AS done
+            FROM old_rows
+            GROUP BY task_id
+        ) d
+        WHERE t.id = d.task_id;
+    ELSE
+        UPDATE tasks t
+        SET subtask_total = t.subtask_total + d.total,
+            subtask_done = t.subtask_done + d.done
+        FROM (
+            SELECT task_id, sum(total) AS total, sum(done) AS done
+            FROM (
+                SELECT task_id, 1 AS total,
+                       coalesce(is_completed, false)::int AS done
+                FROM new_rows
+                UNION ALL
+                SELECT task_id, -1 AS total,
+                       -coalesce(is_completed, false)::int AS done
+                FROM old_rows
+            ) changes
+            GROUP BY task_id
+        ) d
+        WHERE t.id = d.task_id
+          AND (d.total <> 0 OR d.done <> 0);
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+-- Shared by comments and attachments; TG_ARGV[0] names the counter column.
+CREATE OR REPLACE FUNCTION tasks_apply_child_count() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format(
+            'UPDATE tasks t SET %1$I = t.%1$I + d.n '
+            'FROM (SELECT task_id, count(*) AS n FROM new_rows GROUP BY task_id) d '
+            'WHERE t.id = d.task_id',
+            TG_ARGV[0]
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        EXECUTE format(
+            'UPDATE tasks t SET %1$I = t.%1$I - d.n '
+            'FROM (SELECT task_id, count(*) AS n FROM old_rows GROUP BY task_id) d '
+            'WHERE t.id = d.task_id',
+            TG_ARGV[0]
+        );
+    ELSE
+        EXECUTE format(
+            'UPDATE tasks t SET %1$I = t.%1$I + d.n '
+            'FROM ('
+            '    SELECT task_id, sum(n) AS n FROM ('
+            '        SELECT task_id, 1 AS n FROM new_rows'
+            '        UNION ALL'
+            '        SELECT task_id, -1 AS n FROM old_rows'
+            '    ) changes GROUP BY task_id'
+            ') d '
+            'WHERE t.id = d.task_id AND d.n <> 0',
+            TG_ARGV[0]
+        );
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS subtasks_count_insert ON subtasks;
+CREATE TRIGGER subtasks_count_insert
+    AFTER INSERT ON subtasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_subtask_counts();
+
+DROP TRIGGER IF EXISTS subtasks_count_update ON subtasks;
+CREATE TRIGGER subtasks_count_update
+    AFTER UPDATE ON subtasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_subtask_counts();
+
+DROP TRIGGER IF EXISTS subtasks_count_delete ON subtasks;
+CREATE TRIGGER subtasks_count_delete
+    AFTER DELETE ON subtasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_subtask_counts();
+
+DROP TRIGGER IF EXISTS comments_count_insert ON comments;
+CREATE TRIGGER comments_count_insert
+    AFTER INSERT ON comments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_child_count('comment_count');
+
+DROP TRIGGER IF EXISTS comments_count_update ON comments;
+CREATE TRIGGER comments_count_update
+    AFTER UPDATE ON comments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_child_count('comment_count');
+
+DROP TRIGGER IF EXISTS comments_count_delete ON comments;
+CREATE TRIGGER comments_count_delete
+    AFTER DELETE ON comments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_child_count('comment_count');
+
+DROP TRIGGER IF EXISTS attachments_count_insert ON attachments;
+CREATE TRIGGER attachments_count_insert
+    AFTER INSERT ON attachments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_child_count('attachment_count');
+
+DROP TRIGGER IF EXISTS attachments_count_update ON attachments;
+CREATE TRIGGER attachments_count_update
+    AFTER UPDATE ON attachments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_child_count('attachment_count');
+
+DROP TRIGGER IF EXISTS attachments_count_delete ON attachments;
+CREATE TRIGGER attachments_count_delete
+    AFTER DELETE ON attachments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_apply_child_count('attachment_count');
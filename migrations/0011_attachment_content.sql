@@ -0,0 +1,14 @@
+-- migrate:no-transaction
+-- Attachments uploaded through the API point to a content-addressed blob in
+-- attachment storage (app.storage). Rows that only carry an external
+-- file_url keep the new columns NULL. The index serves the reference checks
+-- made before a blob is removed.
+
+ALTER TABLE attachments
+    ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS size_bytes BIGINT,
+    ADD COLUMN IF NOT EXISTS content_type VARCHAR;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attachments_content_sha256
+    ON attachments (content_sha256)
+    WHERE content_sha256 IS NOT NULL;
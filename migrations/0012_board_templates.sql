@@ -0,0 +1,10 @@
+-- migrate:no-transaction
+-- Templates are boards that are only cloned from (app.clone). They stay out
+-- of the regular board list and are paged through their own partial index.
+
+ALTER TABLE boards
+    ADD COLUMN IF NOT EXISTS is_template BOOLEAN DEFAULT false NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_boards_templates_created_at_id
+    ON boards (created_at, id)
+    WHERE is_template AND deleted_at IS NULL;
@@ -0,0 +1,6 @@
+-- migrate:no-transaction
+-- Boards by owner, for the per-user board list. Built concurrently so writes
+-- to boards go on meanwhile; databases that created it in 0006 skip it.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_boards_owner_id
+    ON boards (owner_id);
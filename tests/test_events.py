@@ -0,0 +1,48 @@
+import json
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from uvicorn.config import Config
+
+from app.events import EVENT_CHANNEL, hub
+from app.routers import events
+
+
+class _BoardExists:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def scalar(self, stmt):
+        return 1
+
+
+def test_server_accepts_websocket_upgrades():
+    config = Config(FastAPI(), ws="auto")
+    config.load()
+    assert config.ws_protocol_class is not None
+
+
+def test_board_events_delivers_published_event(monkeypatch):
+    monkeypatch.setattr(events, "AsyncSessionLocal", _BoardExists)
+    # Stands in for the LISTEN task; notifications are fed in directly.
+    monkeypatch.setattr(hub, "task", object())
+
+    app = FastAPI()
+    app.include_router(events.router, prefix="/boards")
+    board_id = str(uuid.uuid4())
+    payload = json.dumps(
+        {"board_id": board_id, "type": "task.updated", "task_id": "t"}
+    )
+
+    with TestClient(app) as client:
+        with client.websocket_connect(f"/boards/{board_id}/events") as ws:
+            client.portal.call(
+                hub._on_notify, None, 0, EVENT_CHANNEL, payload
+            )
+            assert json.loads(ws.receive_text()) == json.loads(payload)
+
+    assert board_id not in hub.subscribers
@@ -0,0 +1,46 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.models import User
+from app.pagination import decode_cursor, encode_cursor
+
+KEYS = [User.created_at, User.id]
+
+
+def _cursor(values) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_decode_cursor_round_trip():
+    values = [datetime(2024, 1, 2, tzinfo=timezone.utc), uuid.uuid4()]
+    assert decode_cursor(encode_cursor(values), KEYS) == values
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["2024-01-02T00:00:00+00:00", 123],
+        ["2024-01-02T00:00:00+00:00", None],
+        ["2024-01-02T00:00:00+00:00", {"hex": "x"}],
+        [["2024-01-02"], str(uuid.uuid4())],
+        [True, str(uuid.uuid4())],
+        ["2024-01-02T00:00:00+00:00"],
+        {"a": 1},
+    ],
+)
+def test_decode_cursor_rejects_tampered_values(values):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(_cursor(values), KEYS)
+    assert exc_info.value.status_code == 400
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not a cursor!", KEYS)
+    assert exc_info.value.status_code == 400